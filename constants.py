@@ -7,4 +7,14 @@ POINTERS_PER_INODE = 5  # Direct pointers
 POINTERS_PER_BLOCK = 1024  # Pointers in indirect block
 INODE_SIZE = 44  # Size of each inode in bytes
 INODES_PER_BLOCK = BLOCK_SIZE // INODE_SIZE  # 93 inodes per block
-MAX_FILENAME = 255
\ No newline at end of file
+MAX_FILENAME = 255
+
+# Block map classes, one byte per block
+BLOCK_SUPER = b'S'
+BLOCK_INODE = b'I'
+BLOCK_USED = b'D'
+BLOCK_FREE = b'.'
+
+# Cache sizes
+INODE_CACHE_SIZE = 4096  # Recently used inodes kept in memory
+COPY_BUFFER_SIZE = 256 * 1024  # Host file I/O chunk for copyin/copyout
\ No newline at end of file
@@ -1,7 +1,9 @@
 """Disk emulator for block-level I/O operations."""
 
+import errno
+import mmap
 import os
-from typing import Optional
+from typing import Iterator, Optional, Tuple
 from constants import BLOCK_SIZE
 
 
@@ -14,24 +16,72 @@ class DiskEmulator:
         self.reads = 0
         self.writes = 0
         self.fd = None
+        self.mm = None
         
     def open(self) -> bool:
         """Open or create the disk image."""
         try:
+            size = self.blocks * BLOCK_SIZE
             if not os.path.exists(self.path):
-                with open(self.path, 'wb') as f:
-                    f.write(b'\x00' * (self.blocks * BLOCK_SIZE))
+                # Create a sparse image; holes read back as zeros
+                fd = os.open(self.path, os.O_CREAT | os.O_RDWR, 0o644)
+                try:
+                    os.ftruncate(fd, size)
+                finally:
+                    os.close(fd)
             
-            self.fd = open(self.path, 'r+b')
+            # A raw descriptor is enough: all block I/O goes through the mapping
+            self.fd = os.open(self.path, os.O_RDWR | getattr(os, 'O_BINARY', 0))
+            
+            # Short images are zero-extended so the whole disk can be mapped
+            if os.fstat(self.fd).st_size < size:
+                os.ftruncate(self.fd, size)
+            
+            self.mm = mmap.mmap(self.fd, size)
             return True
         except Exception as e:
             print(f"Error opening disk: {e}")
+            self.close()
+            return False
+    
+    def erase(self) -> bool:
+        """Discard all disk contents, leaving a sparse image that reads as zeros."""
+        if not self.mm:
+            print("Error: Disk not open")
+            return False
+        
+        try:
+            size = self.blocks * BLOCK_SIZE
+            self.mm.close()
+            self.mm = None
+            os.ftruncate(self.fd, 0)
+            os.ftruncate(self.fd, size)
+            self.mm = mmap.mmap(self.fd, size)
+            return True
+        except Exception as e:
+            print(f"Error erasing disk: {e}")
+            return False
+    
+    def sync(self) -> bool:
+        """Flush pending writes in the mapped image to the backing file."""
+        if not self.mm:
+            return False
+        
+        try:
+            self.mm.flush()
+            return True
+        except Exception as e:
+            print(f"Error syncing disk: {e}")
             return False
     
     def close(self):
         """Close the disk image."""
-        if self.fd:
-            self.fd.close()
+        if self.mm:
+            self.sync()
+            self.mm.close()
+            self.mm = None
+        if self.fd is not None:
+            os.close(self.fd)
             self.fd = None
     
     def read(self, block_num: int) -> Optional[bytes]:
@@ -41,16 +91,109 @@ class DiskEmulator:
             return None
         
         try:
-            self.fd.seek(block_num * BLOCK_SIZE)
-            data = self.fd.read(BLOCK_SIZE)
-            if len(data) < BLOCK_SIZE:
-                data += b'\x00' * (BLOCK_SIZE - len(data))
+            start = block_num * BLOCK_SIZE
+            data = self.mm[start:start + BLOCK_SIZE]
             self.reads += 1
             return data
         except Exception as e:
             print(f"Error reading block {block_num}: {e}")
             return None
     
+    def data_ranges(self, start_block: int, end_block: int) -> Iterator[Tuple[int, int]]:
+        """Yield [start, end) block ranges that may hold data, skipping sparse holes."""
+        end_block = min(end_block, self.blocks)
+        if not hasattr(os, 'SEEK_DATA'):
+            yield start_block, end_block
+            return
+        
+        block = start_block
+        while block < end_block:
+            try:
+                data_start = os.lseek(self.fd, block * BLOCK_SIZE, os.SEEK_DATA)
+                hole_start = os.lseek(self.fd, data_start, os.SEEK_HOLE)
+            except OSError as e:
+                if e.errno != errno.ENXIO:
+                    # Hole detection unsupported here; treat the rest as data
+                    yield block, end_block
+                return
+            
+            first = data_start // BLOCK_SIZE
+            if first >= end_block:
+                return
+            
+            block = min(end_block, -(-hole_start // BLOCK_SIZE))
+            yield first, block
+    
+    def prefetch(self, start_block: int, count: int):
+        """Ask the OS to start reading a run of blocks into memory ahead of use."""
+        if not self.mm or count <= 0 or not hasattr(mmap, 'MADV_WILLNEED'):
+            return
+        
+        start = start_block * BLOCK_SIZE
+        aligned = start - start % mmap.PAGESIZE
+        try:
+            self.mm.madvise(mmap.MADV_WILLNEED, aligned, start + count * BLOCK_SIZE - aligned)
+        except (OSError, ValueError):
+            # Only a hint; the blocks are still read on demand
+            pass
+    
+    def copy_to_fd(self, start_block: int, count: int, out_fd: int, out_offset: int) -> int:
+        """Copy bytes from consecutive blocks to a host file in the kernel; returns bytes copied."""
+        if not self.mm or not hasattr(os, 'copy_file_range'):
+            return 0
+        if start_block < 0 or start_block * BLOCK_SIZE + count > self.blocks * BLOCK_SIZE:
+            print(f"Error: Invalid block range starting at {start_block}")
+            return 0
+        
+        # The mapping is shared, so the descriptor sees writes not yet synced
+        offset = start_block * BLOCK_SIZE
+        copied = 0
+        try:
+            while copied < count:
+                n = os.copy_file_range(self.fd, out_fd, count - copied,
+                                       offset + copied, out_offset + copied)
+                if n <= 0:
+                    break
+                copied += n
+        except OSError:
+            # Unsupported for this pair of files; the caller copies the rest
+            pass
+        
+        self.reads += -(-copied // BLOCK_SIZE)
+        return copied
+    
+    def read_view(self, block_num: int) -> Optional[memoryview]:
+        """Get a zero-copy view of a block; release it before closing the disk."""
+        if block_num < 0 or block_num >= self.blocks:
+            print(f"Error: Invalid block number {block_num}")
+            return None
+        
+        if not self.mm:
+            print("Error: Disk not open")
+            return None
+        
+        start = block_num * BLOCK_SIZE
+        with memoryview(self.mm) as view:
+            block_view = view[start:start + BLOCK_SIZE]
+        self.reads += 1
+        return block_view
+    
+    def write_view(self, block_num: int) -> Optional[memoryview]:
+        """Get a writable view of a block for in-place updates; release it when done."""
+        if block_num < 0 or block_num >= self.blocks:
+            print(f"Error: Invalid block number {block_num}")
+            return None
+        
+        if not self.mm:
+            print("Error: Disk not open")
+            return None
+        
+        start = block_num * BLOCK_SIZE
+        with memoryview(self.mm) as view:
+            block_view = view[start:start + BLOCK_SIZE]
+        self.writes += 1
+        return block_view
+    
     def write(self, block_num: int, data: bytes) -> bool:
         """Write a block to disk."""
         if block_num < 0 or block_num >= self.blocks:
@@ -62,9 +205,8 @@ class DiskEmulator:
             return False
         
         try:
-            self.fd.seek(block_num * BLOCK_SIZE)
-            self.fd.write(data)
-            self.fd.flush()
+            start = block_num * BLOCK_SIZE
+            self.mm[start:start + BLOCK_SIZE] = data
             self.writes += 1
             return True
         except Exception as e:
@@ -1,17 +1,35 @@
 """Core file system implementation."""
 
+import heapq
+import re
 import time
-import struct
-from typing import Dict, List, Optional, Tuple, Any
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple, Any
 from datetime import datetime
 
 from constants import (
     BLOCK_SIZE, MAGIC_NUMBER, POINTERS_PER_INODE,
-    POINTERS_PER_BLOCK, INODES_PER_BLOCK, INODE_SIZE
+    POINTERS_PER_BLOCK, INODES_PER_BLOCK, INODE_SIZE, INODE_CACHE_SIZE,
+    BLOCK_SUPER, BLOCK_INODE, BLOCK_USED, BLOCK_FREE
+)
+from structures import (
+    SuperBlock, Inode, DirEntry, INODE_STRUCT,
+    unpack_pointers, pack_pointers, pointer_view
 )
-from structures import SuperBlock, Inode, DirEntry
 from disk_emulator import DiskEmulator
 
+ZERO_BLOCK = bytes(BLOCK_SIZE)
+NONZERO_BYTE = re.compile(b'[^\x00]')  # Finds the next bitmap byte with a set bit
+HINT_WINDOW = 8  # Bitmap bytes searched past a taken allocation hint
+
+# Inode kinds in the per-inode kind table
+KIND_NONE, KIND_FILE, KIND_DIR = 0, 1, 2
+
+# Every free-bitmap byte expanded to the block map classes of its eight blocks
+BITMAP_CLASSES = [bytes(BLOCK_FREE[0] if byte >> bit & 1 else BLOCK_USED[0] for bit in range(8))
+                  for byte in range(256)]
+
 
 class FileSystem:
     """Main file system implementation."""
@@ -19,7 +37,17 @@ class FileSystem:
     def __init__(self):
         self.disk = None
         self.mounted = False
-        self.free_blocks = []
+        self.free_blocks = bytearray()
+        self.free_block_count = 0
+        self.alloc_version = 0  # Bumped whenever the free block map changes
+        self.alloc_cursor = 0
+        self.recycled_blocks: List[int] = []
+        self.free_inodes = bytearray()
+        self.inode_cursor = 0
+        self.inode_kinds = bytearray()
+        self.inode_sizes = array('I')
+        self.inode_cache: 'OrderedDict[int, Inode]' = OrderedDict()
+        self.dir_index: Dict[int, Dict[str, int]] = {}
         self.superblock = SuperBlock()
         self.current_dir_inode = 0
         self.gui_update_callback = None
@@ -40,6 +68,8 @@ class FileSystem:
             return False
         
         print("Formatting file system...")
+        self.inode_cache.clear()
+        self.dir_index.clear()
         
         # Calculate inode blocks (10% of total, minimum 1)
         inode_blocks = max(1, (disk.blocks + 9) // 10)
@@ -52,14 +82,17 @@ class FileSystem:
         self.superblock.inodes = inodes
         self.superblock.root_inode = 0
         
-        # Write superblock
-        if not disk.write(0, self.superblock.pack()):
+        # Drop all old contents so inode and data blocks start out as zeroed holes
+        if not disk.erase():
             return False
         
-        # Clear inode blocks
-        empty_block = b'\x00' * BLOCK_SIZE
-        for i in range(1, inode_blocks + 1):
-            disk.write(i, empty_block)
+        # Write superblock in place; the rest of the erased block is already zero
+        view = disk.write_view(0)
+        if view is None:
+            return False
+        
+        with view:
+            self.superblock.pack_into(view, 0)
         
         # Create root directory inode
         root = Inode()
@@ -95,6 +128,8 @@ class FileSystem:
         
         self.disk = disk
         self.mounted = True
+        self.inode_cache.clear()
+        self.dir_index.clear()
         self.current_dir_inode = self.superblock.root_inode
         
         # Build free block bitmap
@@ -109,12 +144,29 @@ class FileSystem:
     def unmount(self):
         """Unmount the file system."""
         if self.mounted:
+            self.disk.sync()
             self.disk = None
             self.mounted = False
-            self.free_blocks = []
+            self.free_blocks = bytearray()
+            self.free_block_count = 0
+            self.alloc_version += 1
+            self.recycled_blocks = []
+            self.free_inodes = bytearray()
+            self.inode_kinds = bytearray()
+            self.inode_sizes = array('I')
+            self.inode_cache.clear()
+            self.dir_index.clear()
             print("File system unmounted")
             self._notify_gui()
     
+    def sync(self) -> bool:
+        """Flush all pending writes to the disk image."""
+        if not self.mounted:
+            print("Error: File system not mounted")
+            return False
+        
+        return self.disk.sync()
+    
     def debug(self) -> bool:
         """Print file system debug information."""
         if not self.disk:
@@ -137,35 +189,35 @@ class FileSystem:
         print(f"  Total Inodes: {sb.inodes}")
         print(f"  Root Inode: {sb.root_inode}")
         
-        # Display valid inodes
-        print(f"\nValid Inodes:")
+        # Display valid inodes, collecting the lines to print in one go
+        lines = ["\nValid Inodes:"]
         valid_count = 0
-        for i in range(sb.inodes):
-            inode = self._load_inode(self.disk, i)
-            if inode and inode.valid:
-                valid_count += 1
-                inode_type = "DIR" if inode.inode_type == Inode.TYPE_DIR else "FILE"
-                print(f"  Inode {i} ({inode_type}):")
-                print(f"    Size: {inode.size} bytes")
-                print(f"    Created: {datetime.fromtimestamp(inode.created)}")
-                print(f"    Modified: {datetime.fromtimestamp(inode.modified)}")
-                
-                # Show direct blocks
-                direct_blocks = [b for b in inode.direct if b != 0]
-                if direct_blocks:
-                    print(f"    Direct blocks: {direct_blocks}")
-                
-                # Show indirect block
-                if inode.indirect != 0:
-                    print(f"    Indirect block: {inode.indirect}")
+        for i, fields in self._iter_valid_inodes(self.disk, sb):
+            _, type_code, size, created, modified, *direct, indirect = fields
+            valid_count += 1
+            inode_type = "DIR" if type_code == Inode.TYPE_DIR else "FILE"
+            lines.append(f"  Inode {i} ({inode_type}):")
+            lines.append(f"    Size: {size} bytes")
+            lines.append(f"    Created: {datetime.fromtimestamp(created)}")
+            lines.append(f"    Modified: {datetime.fromtimestamp(modified)}")
+            
+            # Show direct blocks
+            direct_blocks = [b for b in direct if b != 0]
+            if direct_blocks:
+                lines.append(f"    Direct blocks: {direct_blocks}")
+            
+            # Show indirect block
+            if indirect != 0:
+                lines.append(f"    Indirect block: {indirect}")
         
         if valid_count == 0:
-            print("  (no valid inodes)")
+            lines.append("  (no valid inodes)")
+        print("\n".join(lines))
         
         # Show free block statistics
         if self.mounted:
-            free_count = sum(1 for b in self.free_blocks if b)
-            used_count = len(self.free_blocks) - free_count
+            free_count = self.free_block_count
+            used_count = self.superblock.blocks - free_count
             print(f"\nBlock Usage:")
             print(f"  Free blocks: {free_count}")
             print(f"  Used blocks: {used_count}")
@@ -200,6 +252,7 @@ class FileSystem:
         inode.modified = inode.created
         
         if not self._save_inode(self.disk, inode_num, inode):
+            self._free_inode(inode_num)
             return -1
         
         # Add to current directory
@@ -207,6 +260,7 @@ class FileSystem:
             # Cleanup on failure
             inode.valid = 0
             self._save_inode(self.disk, inode_num, inode)
+            self._free_inode(inode_num)
             return -1
         
         self._notify_gui()
@@ -230,17 +284,24 @@ class FileSystem:
         
         # Free indirect blocks
         if inode.indirect != 0:
-            indirect_data = self.disk.read(inode.indirect)
-            if indirect_data:
-                pointers = struct.unpack('<' + 'I' * POINTERS_PER_BLOCK, indirect_data)
-                for ptr in pointers:
-                    if ptr != 0:
-                        self._free_block(ptr)
+            if inode._indirect_cache is not None:
+                for ptr in filter(None, inode._indirect_cache):
+                    self._free_block(ptr)
+            else:
+                # Walk the pointers in place rather than caching a copy
+                view = self.disk.read_view(inode.indirect)
+                if view is not None:
+                    with view, pointer_view(view) as pointers:
+                        for ptr in filter(None, pointers):
+                            self._free_block(ptr)
             self._free_block(inode.indirect)
         
         # Mark inode as invalid
         inode.valid = 0
+        self.dir_index.pop(inode_num, None)
         result = self._save_inode(self.disk, inode_num, inode)
+        if result:
+            self._free_inode(inode_num)
         
         self._notify_gui()
         return result
@@ -251,11 +312,10 @@ class FileSystem:
             print("Error: File system not mounted")
             return -1
         
-        inode = self._load_inode(self.disk, inode_num)
-        if not inode or not inode.valid:
-            return -1
-        
-        return inode.size
+        # Answered from the kind and size tables, without decoding the inode
+        if 0 <= inode_num < len(self.inode_kinds) and self.inode_kinds[inode_num]:
+            return self.inode_sizes[inode_num]
+        return -1
     
     def read(self, inode_num: int, length: int, offset: int = 0) -> Optional[bytes]:
         """Read data from a file."""
@@ -273,7 +333,41 @@ class FileSystem:
             return b''
         
         length = min(length, inode.size - offset)
-        result = bytearray()
+        if length <= 0:
+            return b''
+        
+        # A read within one block is a single copy out of the disk view
+        block_offset = offset % BLOCK_SIZE
+        if block_offset + length <= BLOCK_SIZE:
+            block_num = self._get_block_pointer(inode, offset // BLOCK_SIZE)
+            block_view = self.disk.read_view(block_num) if block_num else None
+            if block_view is None:
+                return b''
+            with block_view:
+                return bytes(block_view[block_offset:block_offset + length])
+        
+        result = bytearray(length)
+        with memoryview(result) as out:
+            bytes_read = self._read_into(inode, out, offset)
+        return bytes(result[:bytes_read]) if bytes_read < length else bytes(result)
+    
+    def readinto(self, inode_num: int, buffer, offset: int = 0) -> int:
+        """Read file data into a caller-provided writable buffer. Returns bytes read or -1."""
+        if not self.mounted:
+            print("Error: File system not mounted")
+            return -1
+        
+        inode = self._load_inode(self.disk, inode_num)
+        if not inode or not inode.valid:
+            print(f"Error: Invalid inode {inode_num}")
+            return -1
+        
+        with memoryview(buffer) as out:
+            return self._read_into(inode, out, offset)
+    
+    def _read_into(self, inode: Inode, out: memoryview, offset: int) -> int:
+        """Copy file data from the disk views into out, stopping at a hole or EOF."""
+        length = max(0, min(len(out), inode.size - offset))
         bytes_read = 0
         
         while bytes_read < length:
@@ -287,17 +381,18 @@ class FileSystem:
             if block_num == 0:
                 break
             
-            # Read from block
-            block_data = self.disk.read(block_num)
-            if not block_data:
+            # Copy straight from the disk view into place
+            block_view = self.disk.read_view(block_num)
+            if block_view is None:
                 break
             
-            # Copy data
             bytes_to_copy = min(BLOCK_SIZE - block_offset, length - bytes_read)
-            result.extend(block_data[block_offset:block_offset + bytes_to_copy])
+            with block_view:
+                out[bytes_read:bytes_read + bytes_to_copy] = \
+                    block_view[block_offset:block_offset + bytes_to_copy]
             bytes_read += bytes_to_copy
         
-        return bytes(result)
+        return bytes_read
     
     def write(self, inode_num: int, data: bytes, offset: int = 0) -> int:
         """Write data to a file."""
@@ -312,6 +407,7 @@ class FileSystem:
         
         bytes_written = 0
         data_len = len(data)
+        src = memoryview(data)
         
         while bytes_written < data_len:
             # Calculate block and offset
@@ -321,8 +417,11 @@ class FileSystem:
             
             # Get or allocate block
             block_num = self._get_block_pointer(inode, block_index)
-            if block_num == 0:
-                block_num = self._allocate_block()
+            fresh_block = block_num == 0
+            if fresh_block:
+                # Prefer the block right after the file's previous block
+                prev_block = self._get_block_pointer(inode, block_index - 1) if block_index else 0
+                block_num = self._allocate_block(prev_block + 1 if prev_block else 0)
                 if block_num < 0:
                     print("Error: Disk full")
                     break
@@ -331,23 +430,35 @@ class FileSystem:
                     self._free_block(block_num)
                     break
             
-            # Read existing block data if we're doing partial write
-            if block_offset != 0 or (data_len - bytes_written) < BLOCK_SIZE:
-                block_data = bytearray(self.disk.read(block_num) or b'\x00' * BLOCK_SIZE)
-            else:
-                block_data = bytearray(BLOCK_SIZE)
-            
-            # Write new data
             bytes_to_write = min(BLOCK_SIZE - block_offset, data_len - bytes_written)
-            block_data[block_offset:block_offset + bytes_to_write] = \
-                data[bytes_written:bytes_written + bytes_to_write]
+            chunk = src[bytes_written:bytes_written + bytes_to_write]
             
-            # Write block back
-            if not self.disk.write(block_num, bytes(block_data)):
+            if bytes_to_write == BLOCK_SIZE:
+                # Whole block: write the caller's data straight through
+                ok = self.disk.write(block_num, chunk)
+            else:
+                # Partial block: patch the bytes in place in the mapped block,
+                # except that a newly allocated block is zeroed rather than stale
+                view = self.disk.write_view(block_num)
+                ok = view is not None
+                if ok:
+                    with view:
+                        end = block_offset + bytes_to_write
+                        if fresh_block:
+                            view[:block_offset] = ZERO_BLOCK[:block_offset]
+                            view[end:] = ZERO_BLOCK[end:]
+                        view[block_offset:end] = chunk
+            
+            if not ok:
                 break
             
             bytes_written += bytes_to_write
         
+        src.release()
+        
+        # Directory contents may have changed under the cached index
+        self.dir_index.pop(inode_num, None)
+        
         # Update inode size and modification time
         inode.size = max(inode.size, offset + bytes_written)
         inode.modified = int(time.time())
@@ -356,6 +467,36 @@ class FileSystem:
         self._notify_gui()
         return bytes_written
     
+    def extents(self, inode_num: int) -> List[Tuple[int, int]]:
+        """Get (first block, byte count) runs covering a file up to its first hole."""
+        if not self.mounted:
+            print("Error: File system not mounted")
+            return []
+        
+        inode = self._load_inode(self.disk, inode_num)
+        if not inode or not inode.valid:
+            print(f"Error: Invalid inode {inode_num}")
+            return []
+        
+        runs = []
+        remaining = inode.size
+        block_index = 0
+        while remaining > 0:
+            block_num = self._get_block_pointer(inode, block_index)
+            if block_num == 0:
+                break
+            
+            length = min(BLOCK_SIZE, remaining)
+            if runs and runs[-1][0] + runs[-1][1] // BLOCK_SIZE == block_num:
+                runs[-1] = (runs[-1][0], runs[-1][1] + length)
+            else:
+                runs.append((block_num, length))
+            
+            remaining -= length
+            block_index += 1
+        
+        return runs
+    
     def mkdir(self, name: str) -> int:
         """Create a new directory."""
         if not self.mounted:
@@ -382,11 +523,11 @@ class FileSystem:
         inode.modified = inode.created
         
         if not self._save_inode(self.disk, inode_num, inode):
+            self._free_inode(inode_num)
             return -1
         
         # Add . and .. entries
-        self._add_dir_entry(inode_num, ".", inode_num)
-        self._add_dir_entry(inode_num, "..", self.current_dir_inode)
+        self._add_dir_entries(inode_num, [(".", inode_num), ("..", self.current_dir_inode)])
         
         # Add to parent directory
         if not self._add_dir_entry(self.current_dir_inode, name, inode_num):
@@ -410,22 +551,21 @@ class FileSystem:
         if dir_inode.size == 0:
             return []
         
-        data = self.read(self.current_dir_inode, dir_inode.size)
+        data = self._read_dir_data(dir_inode)
         if not data:
             return []
         
-        # Parse directory entries
-        entry_size = DirEntry.ENTRY_SIZE
-        for i in range(0, len(data), entry_size):
-            if i + entry_size > len(data):
-                break
+        # Parse directory entries, decoding names only for live entries
+        for raw_name, inode_num in DirEntry.iter_raw_entries(data):
+            if not raw_name[0] or inode_num >= self.superblock.inodes:
+                continue
             
-            entry = DirEntry.unpack(data[i:i+entry_size])
-            if entry.name and entry.inode_num < self.superblock.inodes:
-                inode = self._load_inode(self.disk, entry.inode_num)
-                if inode and inode.valid:
-                    inode_type = "DIR" if inode.inode_type == Inode.TYPE_DIR else "FILE"
-                    entries.append((entry.name, entry.inode_num, inode_type, inode.size))
+            kind = self.inode_kinds[inode_num]
+            if kind:
+                name = DirEntry.decode_name(raw_name)
+                if name:
+                    inode_type = "DIR" if kind == KIND_DIR else "FILE"
+                    entries.append((name, inode_num, inode_type, self.inode_sizes[inode_num]))
         
         return entries
     
@@ -447,8 +587,7 @@ class FileSystem:
             return False
         
         # Verify it's a directory
-        inode = self._load_inode(self.disk, target_inode)
-        if not inode or not inode.valid or inode.inode_type != Inode.TYPE_DIR:
+        if target_inode >= len(self.inode_kinds) or self.inode_kinds[target_inode] != KIND_DIR:
             print(f"Error: '{path}' is not a directory")
             return False
         
@@ -462,115 +601,309 @@ class FileSystem:
         
         total_blocks = self.superblock.blocks
         
-        # Categorize blocks
-        superblock_blocks = [0]
-        inode_blocks = list(range(1, self.superblock.inode_blocks + 1))
-        data_blocks_used = []
-        data_blocks_free = []
-        
-        data_start = self.superblock.inode_blocks + 1
-        for i in range(data_start, total_blocks):
-            if i < len(self.free_blocks):
-                if self.free_blocks[i]:
-                    data_blocks_free.append(i)
-                else:
-                    data_blocks_used.append(i)
+        # Metadata blocks are never free, so the counts follow from the bitmap
+        meta_blocks = min(self.superblock.inode_blocks + 1, total_blocks)
+        data_blocks_free = self.free_block_count
         
         return {
             'total_blocks': total_blocks,
-            'superblock_blocks': superblock_blocks,
-            'inode_blocks': inode_blocks,
-            'data_blocks_used': data_blocks_used,
-            'data_blocks_free': data_blocks_free,
+            'block_map': bytes(self.block_map()),
+            'superblock_count': min(1, total_blocks),
+            'inode_count': max(0, meta_blocks - 1),
+            'data_used_count': total_blocks - meta_blocks - data_blocks_free,
+            'data_free_count': data_blocks_free,
             'disk_reads': self.disk.reads if self.disk else 0,
             'disk_writes': self.disk.writes if self.disk else 0,
+            'alloc_version': self.alloc_version,
         }
     
+    def block_map(self) -> bytearray:
+        """Classify every block as superblock, inode, used or free data, one byte each."""
+        if not self.mounted:
+            return bytearray()
+        
+        # Expand the free bitmap eight blocks per lookup, then mark metadata
+        total_blocks = self.superblock.blocks
+        classes = bytearray(b''.join(map(BITMAP_CLASSES.__getitem__, self.free_blocks)))
+        del classes[total_blocks:]
+        
+        meta_end = min(self.superblock.inode_blocks + 1, total_blocks)
+        if meta_end:
+            classes[0] = BLOCK_SUPER[0]
+            classes[1:meta_end] = BLOCK_INODE * (meta_end - 1)
+        return classes
+    
     def _build_free_block_map(self):
-        """Build free block bitmap by scanning inodes."""
-        self.free_blocks = [True] * self.superblock.blocks
-        
-        # Mark superblock and inode blocks as used
-        for i in range(self.superblock.inode_blocks + 1):
-            if i < len(self.free_blocks):
-                self.free_blocks[i] = False
-        
-        # Scan all inodes and mark used blocks
-        for i in range(self.superblock.inodes):
-            inode = self._load_inode(self.disk, i)
-            if inode and inode.valid:
-                # Mark direct blocks
-                for block in inode.direct:
-                    if 0 < block < self.superblock.blocks:
-                        self.free_blocks[block] = False
+        """Build free block and free inode bitmaps by scanning inodes."""
+        nblocks = self.superblock.blocks
+        
+        # Start with every block and inode free (one bit each, set = free)
+        self.free_blocks = self._full_bitmap(nblocks)
+        self.free_inodes = self._full_bitmap(self.superblock.inodes)
+        self.inode_cursor = 0
+        self.inode_kinds = bytearray(self.superblock.inodes)
+        self.inode_sizes = array('I', bytes(4 * self.superblock.inodes))
+        self.alloc_cursor = 0
+        self.recycled_blocks = []
+        
+        # Mark superblock and inode blocks as used: clear whole bytes with
+        # one slice assignment, then the low bits of the partial byte
+        meta_end = min(self.superblock.inode_blocks + 1, nblocks)
+        self.free_blocks[:meta_end >> 3] = bytes(meta_end >> 3)
+        if meta_end & 7:
+            self.free_blocks[meta_end >> 3] &= 0xff << (meta_end & 7) & 0xff
+        
+        # Decode every valid inode straight from the on-disk inode table,
+        # gathering the block pointers of all files into one flat array
+        used = array('I')
+        indirects = []
+        free_inodes = self.free_inodes
+        for inode_num, fields in self._iter_valid_inodes(self.disk, self.superblock):
+            free_inodes[inode_num >> 3] &= ~(1 << (inode_num & 7))
+            self._record_inode(inode_num, fields[0], fields[1], fields[2])
+            
+            # Direct blocks and the indirect block itself
+            used.extend(fields[5:11])
+            if 0 < fields[10] < nblocks:
+                indirects.append(fields[10])
+        
+        # Queue reads of all indirect blocks at once, then add the blocks
+        # they point to, read in place
+        for indirect in indirects:
+            self.disk.prefetch(indirect, 1)
+        for indirect in indirects:
+            view = self.disk.read_view(indirect)
+            if view is not None:
+                with view, pointer_view(view) as pointers:
+                    used.extend(pointers)
+        
+        # Clear the bit of every referenced block in a single tight pass
+        bitmap = self.free_blocks
+        for block in filter(None, used):
+            if block < nblocks:
+                bitmap[block >> 3] &= ~(1 << (block & 7))
+        
+        self.free_block_count = bin(int.from_bytes(self.free_blocks, 'little')).count('1')
+        self.alloc_version += 1
+    
+    def _iter_valid_inodes(self, disk: DiskEmulator,
+                           sb: SuperBlock) -> Iterator[Tuple[int, Tuple[int, ...]]]:
+        """Yield (inode number, raw inode fields) for every valid inode on disk."""
+        table_bytes = INODES_PER_BLOCK * INODE_SIZE
+        
+        # Inode blocks in sparse holes hold only free inodes, so read just
+        # the data-bearing runs of the inode table, queuing them all up front
+        ranges = list(disk.data_ranges(1, sb.inode_blocks + 1))
+        for first_block, end_block in ranges:
+            disk.prefetch(first_block, end_block - first_block)
+        
+        for first_block, end_block in ranges:
+            for block in range(first_block, end_block):
+                view = disk.read_view(block)
+                if view is None:
+                    continue
                 
-                # Mark indirect blocks
-                if 0 < inode.indirect < self.superblock.blocks:
-                    self.free_blocks[inode.indirect] = False
-                    
-                    # Mark blocks pointed to by indirect block
-                    indirect_data = self.disk.read(inode.indirect)
-                    if indirect_data:
-                        pointers = struct.unpack('<' + 'I' * POINTERS_PER_BLOCK, indirect_data)
-                        for ptr in pointers:
-                            if 0 < ptr < self.superblock.blocks:
-                                self.free_blocks[ptr] = False
+                # Unpack in place, releasing the view before yielding
+                first_inode = (block - 1) * INODES_PER_BLOCK
+                with view:
+                    # A zeroed inode block holds only free inodes
+                    if view == ZERO_BLOCK:
+                        continue
+                    valid = [(inode_num, fields) for inode_num, fields
+                             in enumerate(INODE_STRUCT.iter_unpack(view[:table_bytes]), first_inode)
+                             if fields[0] and inode_num < sb.inodes]
+                yield from valid
+    
+    @staticmethod
+    def _full_bitmap(count: int) -> bytearray:
+        """Create a bitmap with the first count bits set."""
+        bitmap = bytearray(b'\xff' * (count // 8))
+        if count % 8:
+            bitmap.append((1 << (count % 8)) - 1)
+        return bitmap
     
     def _allocate_inode(self) -> int:
-        """Find and allocate a free inode."""
-        for i in range(self.superblock.inodes):
-            inode = self._load_inode(self.disk, i)
-            if inode and not inode.valid:
-                return i
-        return -1
+        """Find and allocate the lowest free inode from the free inode bitmap."""
+        # Every inode in the bytes before the cursor is in use
+        match = NONZERO_BYTE.search(self.free_inodes, self.inode_cursor)
+        if not match:
+            self.inode_cursor = len(self.free_inodes)
+            return -1
+        
+        idx = match.start()
+        self.inode_cursor = idx
+        byte = self.free_inodes[idx]
+        bit = (byte & -byte).bit_length() - 1
+        self.free_inodes[idx] = byte & ~(1 << bit)
+        return idx * 8 + bit
     
-    def _allocate_block(self) -> int:
-        """Find and allocate a free block."""
-        for i in range(self.superblock.inode_blocks + 1, self.superblock.blocks):
-            if i < len(self.free_blocks) and self.free_blocks[i]:
-                self.free_blocks[i] = False
-                return i
-        return -1
+    def _free_inode(self, inode_num: int):
+        """Return an inode to the free inode bitmap."""
+        if 0 <= inode_num < self.superblock.inodes:
+            self.free_inodes[inode_num >> 3] |= 1 << (inode_num & 7)
+            self.inode_cursor = min(self.inode_cursor, inode_num >> 3)
+    
+    def _allocate_block(self, hint: int = 0) -> int:
+        """Allocate the hinted block or one near it if possible, otherwise the lowest free block."""
+        if self.superblock.inode_blocks < hint < self.superblock.blocks:
+            if self._is_block_free(hint):
+                self._use_block(hint)
+                return hint
+            
+            # Hinted block taken: settle for a free block just past it, ignoring
+            # the bits below the hint in its own bitmap byte
+            idx = hint >> 3
+            byte = self.free_blocks[idx] & (0xff << (hint & 7)) & 0xff
+            if not byte:
+                match = NONZERO_BYTE.search(self.free_blocks, idx + 1, idx + HINT_WINDOW)
+                if match:
+                    idx = match.start()
+                    byte = self.free_blocks[idx]
+            if byte:
+                block_num = idx * 8 + (byte & -byte).bit_length() - 1
+                self._use_block(block_num)
+                return block_num
+        
+        # Blocks freed behind the scan cursor are kept in a min-heap; entries
+        # taken since through a hint are skipped lazily
+        while self.recycled_blocks:
+            block_num = heapq.heappop(self.recycled_blocks)
+            if self._is_block_free(block_num):
+                self._use_block(block_num)
+                return block_num
+        
+        # Bytes before the cursor have no other free blocks; metadata blocks
+        # are never marked free, so the first set bit is a data block
+        match = NONZERO_BYTE.search(self.free_blocks, self.alloc_cursor)
+        if not match:
+            self.alloc_cursor = len(self.free_blocks)
+            return -1
+        
+        idx = match.start()
+        byte = self.free_blocks[idx]
+        block_num = idx * 8 + (byte & -byte).bit_length() - 1
+        self.alloc_cursor = idx
+        self._use_block(block_num)
+        return block_num
+    
+    def _is_block_free(self, block_num: int) -> bool:
+        """Check whether a block is marked free in the bitmap."""
+        return bool(self.free_blocks[block_num >> 3] & (1 << (block_num & 7)))
+    
+    def _use_block(self, block_num: int):
+        """Mark a block as used in the bitmap."""
+        mask = 1 << (block_num & 7)
+        if self.free_blocks[block_num >> 3] & mask:
+            self.free_blocks[block_num >> 3] &= ~mask
+            self.free_block_count -= 1
+            self.alloc_version += 1
     
     def _free_block(self, block_num: int):
         """Free a block."""
-        if 0 <= block_num < len(self.free_blocks):
-            self.free_blocks[block_num] = True
+        if self.superblock.inode_blocks < block_num < self.superblock.blocks:
+            mask = 1 << (block_num & 7)
+            if not self.free_blocks[block_num >> 3] & mask:
+                self.free_blocks[block_num >> 3] |= mask
+                self.free_block_count += 1
+                self.alloc_version += 1
+                if block_num >> 3 < self.alloc_cursor:
+                    heapq.heappush(self.recycled_blocks, block_num)
     
     def _load_inode(self, disk: DiskEmulator, inode_num: int) -> Optional[Inode]:
-        """Load an inode from disk."""
+        """Load an inode, serving it from the inode cache when possible."""
         if inode_num < 0 or inode_num >= self.superblock.inodes:
             return None
         
+        # Cached inodes are shared; callers must save any changes they make
+        inode = self.inode_cache.get(inode_num)
+        if inode is not None:
+            self.inode_cache.move_to_end(inode_num)
+            return inode
+        
         # Calculate block and offset
         block_num = 1 + (inode_num // INODES_PER_BLOCK)
         block_offset = (inode_num % INODES_PER_BLOCK) * INODE_SIZE
         
-        # Read block
-        data = disk.read(block_num)
-        if not data:
+        # Decode straight from the mapped inode table, without copying the block
+        view = disk.read_view(block_num)
+        if view is None:
             return None
         
-        return Inode.unpack(data[block_offset:block_offset + INODE_SIZE])
+        with view:
+            inode = Inode.unpack_from(view, block_offset)
+        self._cache_inode(inode_num, inode)
+        return inode
+    
+    def _cache_inode(self, inode_num: int, inode: Inode):
+        """Insert an inode into the cache, evicting the least recently used."""
+        self.inode_cache[inode_num] = inode
+        self.inode_cache.move_to_end(inode_num)
+        if len(self.inode_cache) > INODE_CACHE_SIZE:
+            self.inode_cache.popitem(last=False)
     
     def _save_inode(self, disk: DiskEmulator, inode_num: int, inode: Inode) -> bool:
         """Save an inode to disk."""
         if inode_num < 0 or inode_num >= self.superblock.inodes:
             return False
         
+        # Write back any pending indirect pointer updates first
+        if not self._flush_indirect(disk, inode):
+            return False
+        
         # Calculate block and offset
         block_num = 1 + (inode_num // INODES_PER_BLOCK)
         block_offset = (inode_num % INODES_PER_BLOCK) * INODE_SIZE
         
-        # Read block
-        block_data = bytearray(disk.read(block_num) or b'\x00' * BLOCK_SIZE)
+        # Pack the inode in place into its slot in the mapped inode block
+        view = disk.write_view(block_num)
+        if view is None:
+            self.inode_cache.pop(inode_num, None)
+            return False
+        
+        with view:
+            inode.pack_into(view, block_offset)
+        
+        self._record_inode(inode_num, inode.valid, inode.inode_type, inode.size)
+        self._cache_inode(inode_num, inode)
+        return True
+    
+    def _record_inode(self, inode_num: int, valid: int, inode_type: int, size: int):
+        """Update an inode's entries in the kind and size tables."""
+        if inode_num < len(self.inode_kinds):
+            if not valid:
+                self.inode_kinds[inode_num] = KIND_NONE
+            else:
+                self.inode_kinds[inode_num] = KIND_DIR if inode_type == Inode.TYPE_DIR else KIND_FILE
+            self.inode_sizes[inode_num] = size
+    
+    def _load_indirect(self, inode: Inode) -> Optional[array]:
+        """Get the inode's indirect pointers, reading the block on first use."""
+        if inode._indirect_cache is None:
+            if inode.indirect == 0:
+                return None
+            
+            # Copy the pointers once, straight out of the mapped block
+            view = self.disk.read_view(inode.indirect)
+            if view is None:
+                return None
+            
+            with view:
+                inode._indirect_cache = unpack_pointers(view)
+        
+        return inode._indirect_cache
+    
+    def _flush_indirect(self, disk: DiskEmulator, inode: Inode) -> bool:
+        """Write the cached indirect pointers back to disk if modified."""
+        if not inode._indirect_dirty:
+            return True
         
-        # Update inode data
-        inode_data = inode.pack()
-        block_data[block_offset:block_offset + INODE_SIZE] = inode_data
+        # The cached pointers are written straight from their buffer
+        with pack_pointers(inode._indirect_cache) as data:
+            if not disk.write(inode.indirect, data):
+                return False
         
-        # Write back
-        return disk.write(block_num, bytes(block_data))
+        inode._indirect_dirty = False
+        return True
     
     def _get_block_pointer(self, inode: Inode, block_index: int) -> int:
         """Get block pointer from inode."""
@@ -578,79 +911,111 @@ class FileSystem:
             return inode.direct[block_index]
         
         # Use indirect block
-        if inode.indirect == 0:
-            return 0
-        
-        indirect_data = self.disk.read(inode.indirect)
-        if not indirect_data:
-            return 0
-        
         indirect_index = block_index - POINTERS_PER_INODE
         if indirect_index >= POINTERS_PER_BLOCK:
             return 0
         
-        pointers = struct.unpack('<' + 'I' * POINTERS_PER_BLOCK, indirect_data)
+        pointers = self._load_indirect(inode)
+        if pointers is None:
+            return 0
+        
         return pointers[indirect_index]
     
     def _set_block_pointer(self, inode: Inode, block_index: int, block_num: int) -> bool:
         """Set block pointer in inode."""
         if block_index < POINTERS_PER_INODE:
-            inode.direct[block_index] = block_num
+            # Direct pointers are an immutable tuple; rebuild it on the rare update
+            direct = list(inode.direct)
+            direct[block_index] = block_num
+            inode.direct = tuple(direct)
             return True
         
+        indirect_index = block_index - POINTERS_PER_INODE
+        if indirect_index >= POINTERS_PER_BLOCK:
+            return False
+        
         # Use indirect block
         if inode.indirect == 0:
-            inode.indirect = self._allocate_block()
-            if inode.indirect < 0:
+            indirect = self._allocate_block()
+            if indirect < 0:
                 return False
             
-            # Initialize indirect block
-            empty_pointers = struct.pack('<' + 'I' * POINTERS_PER_BLOCK, *([0] * POINTERS_PER_BLOCK))
-            self.disk.write(inode.indirect, empty_pointers)
-        
-        # Update indirect block
-        indirect_data = bytearray(self.disk.read(inode.indirect))
-        indirect_index = block_index - POINTERS_PER_INODE
+            # Initialize indirect block (written out on next inode save)
+            inode.indirect = indirect
+            inode._indirect_cache = array('I', bytes(BLOCK_SIZE))
+            inode._indirect_dirty = True
         
-        if indirect_index >= POINTERS_PER_BLOCK:
+        pointers = self._load_indirect(inode)
+        if pointers is None:
             return False
         
         # Update pointer
-        struct.pack_into('<I', indirect_data, indirect_index * 4, block_num)
-        return self.disk.write(inode.indirect, bytes(indirect_data))
+        pointers[indirect_index] = block_num
+        inode._indirect_dirty = True
+        return True
     
     def _find_dir_entry(self, dir_inode_num: int, name: str) -> int:
         """Find a directory entry by name. Returns inode number or -1."""
-        dir_inode = self._load_inode(self.disk, dir_inode_num)
-        if not dir_inode or not dir_inode.valid or dir_inode.size == 0:
+        index = self._get_dir_index(dir_inode_num)
+        if index is None:
             return -1
         
-        # Read directory data
-        data = self.read(dir_inode_num, dir_inode.size)
-        if not data:
-            return -1
+        return index.get(name, -1)
+    
+    def _get_dir_index(self, dir_inode_num: int) -> Optional[Dict[str, int]]:
+        """Get the name-to-inode index of a directory, building it on first use."""
+        index = self.dir_index.get(dir_inode_num)
+        if index is not None:
+            return index
         
-        # Search for entry
-        entry_size = DirEntry.ENTRY_SIZE
-        for i in range(0, len(data), entry_size):
-            if i + entry_size > len(data):
-                break
+        dir_inode = self._load_inode(self.disk, dir_inode_num)
+        if not dir_inode or not dir_inode.valid:
+            return None
+        
+        index = {}
+        if dir_inode.size > 0:
+            # Read directory data
+            data = self._read_dir_data(dir_inode)
             
-            entry = DirEntry.unpack(data[i:i+entry_size])
-            if entry.name == name:
-                return entry.inode_num
+            # Index entries; the first entry with a given name wins
+            for name, inode_num in DirEntry.iter_entries(data):
+                index.setdefault(name, inode_num)
         
-        return -1
+        self.dir_index[dir_inode_num] = index
+        return index
+    
+    def _read_dir_data(self, dir_inode: Inode) -> bytearray:
+        """Read a directory's entries straight into a buffer sized to the directory."""
+        data = bytearray(dir_inode.size)
+        with memoryview(data) as out:
+            bytes_read = self._read_into(dir_inode, out, 0)
+        if bytes_read < len(data):
+            del data[bytes_read:]
+        return data
     
     def _add_dir_entry(self, dir_inode_num: int, name: str, inode_num: int) -> bool:
         """Add an entry to a directory."""
-        entry = DirEntry(name, inode_num)
-        entry_data = entry.pack()
+        return self._add_dir_entries(dir_inode_num, [(name, inode_num)])
+    
+    def _add_dir_entries(self, dir_inode_num: int, entries: List[Tuple[str, int]]) -> bool:
+        """Append several entries to a directory with a single write."""
+        entry_size = DirEntry.ENTRY_SIZE
+        entry_data = bytearray(entry_size * len(entries))
+        for i, (name, inode_num) in enumerate(entries):
+            DirEntry(name, inode_num).pack_into(entry_data, i * entry_size)
         
         dir_inode = self._load_inode(self.disk, dir_inode_num)
         if not dir_inode or not dir_inode.valid:
             return False
         
-        # Append entry to directory
+        # Append entries to directory (write() drops the index, so keep it)
+        index = self.dir_index.get(dir_inode_num)
         bytes_written = self.write(dir_inode_num, entry_data, dir_inode.size)
-        return bytes_written == len(entry_data)
\ No newline at end of file
+        if bytes_written != len(entry_data):
+            return False
+        
+        if index is not None:
+            for name, inode_num in DirEntry.iter_entries(entry_data):
+                index.setdefault(name, inode_num)
+            self.dir_index[dir_inode_num] = index
+        return True
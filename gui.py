@@ -1,9 +1,10 @@
 """Tkinter GUI for block allocation visualization."""
 
-import threading
 import time
 from typing import TYPE_CHECKING
 
+from constants import BLOCK_SUPER, BLOCK_INODE, BLOCK_USED, BLOCK_FREE
+
 try:
     import tkinter as tk
     from tkinter import ttk
@@ -15,6 +16,15 @@ except ImportError:
 if TYPE_CHECKING:
     from file_system import FileSystem
 
+UPDATE_MIN_MS = 250  # Refresh delay right after a change
+UPDATE_MAX_MS = 4000  # Longest refresh delay once the file system goes idle
+BLOCK_PX = 20  # Pixel pitch of one block cell in the grid
+DIFF_SPAN = 64  # Blocks compared at once when looking for grid changes
+RASTER_BLOCKS = 4096  # Grids larger than this are drawn as a single image
+RASTER_PX = 6  # Pixel pitch of one block tile in the image
+RASTER_COLS = 160  # Columns of tiles in the image
+ROW_BUFFER = 10  # Grid rows kept drawn above and below the visible area
+
 
 class BlockVisualizationGUI:
     """Tkinter GUI for real-time block allocation visualization."""
@@ -41,8 +51,26 @@ class BlockVisualizationGUI:
             'text': '#ecf0f1'          # Light text
         }
         
-        self.block_buttons = []
-        self.last_data = None
+        # (color, type, description, label) for every block map class byte
+        free_style = (self.colors['free'], 'Free Block', 'Available for allocation', '')
+        self.block_styles = [free_style] * 256
+        self.block_styles[BLOCK_SUPER[0]] = (self.colors['superblock'], 'Superblock',
+                                             'File system metadata', 'S')
+        self.block_styles[BLOCK_INODE[0]] = (self.colors['inode'], 'Inode Block',
+                                             'File/directory metadata', 'I')
+        self.block_styles[BLOCK_USED[0]] = (self.colors['used'], 'Data Block (Used)',
+                                            'Contains file data', 'D')
+        
+        self.block_items = []
+        self.block_image = None
+        self.block_map = b''
+        self.drawn_map = bytearray()
+        self.hover_block = None
+        self.last_state = None
+        self.stat_text = {}
+        self.grid_version = None
+        self.update_delay = UPDATE_MIN_MS
+        self.update_job = None
         
         self.create_widgets()
         self.update_loop()
@@ -80,8 +108,8 @@ class BlockVisualizationGUI:
         main_container.pack(fill='both', expand=True, padx=10, pady=10)
         
         # Canvas with scrollbar for scrolling
-        canvas = tk.Canvas(main_container, bg=self.colors['bg'], highlightthickness=0)
-        scrollbar = tk.Scrollbar(main_container, orient="vertical", command=canvas.yview)
+        canvas = self.page_canvas = tk.Canvas(main_container, bg=self.colors['bg'], highlightthickness=0)
+        scrollbar = self.page_scrollbar = tk.Scrollbar(main_container, orient="vertical", command=canvas.yview)
         self.scrollable_frame = tk.Frame(canvas, bg=self.colors['bg'])
         
         self.scrollable_frame.bind(
@@ -90,7 +118,7 @@ class BlockVisualizationGUI:
         )
         
         canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
+        canvas.configure(yscrollcommand=self.on_page_scroll)
         
         canvas.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
@@ -168,20 +196,48 @@ class BlockVisualizationGUI:
         )
         title.pack()
         
-        # Scrollable blocks grid
-        self.blocks_grid_frame = tk.Frame(blocks_container, bg='#34495e')
-        self.blocks_grid_frame.pack(padx=15, pady=15)
+        # Blocks grid, drawn as items on a single canvas
+        self.blocks_canvas = tk.Canvas(
+            blocks_container,
+            bg='#34495e',
+            highlightthickness=0,
+            width=0,
+            height=0
+        )
+        self.blocks_canvas.pack(padx=15, pady=15)
+        
+        # One pointer handler finds the hovered block from its position
+        self.blocks_canvas.bind('<Motion>', self.on_grid_motion)
+        self.blocks_canvas.bind('<Leave>', self.on_grid_leave)
         
         # Info label
         info_label = tk.Label(
             self.scrollable_frame,
-            text="Hover over blocks to see details • Updates automatically every second",
+            text="Hover over blocks to see details • Updates automatically as blocks change",
             font=('Helvetica', 10, 'italic'),
             bg=self.colors['bg'],
             fg='#95a5a6',
             pady=10
         )
         info_label.pack()
+        
+        # Tooltip window shared by all blocks, hidden until a block is hovered
+        self.tooltip = tk.Toplevel(self.root)
+        self.tooltip.wm_overrideredirect(True)
+        self.tooltip.withdraw()
+        
+        self.tooltip_label = tk.Label(
+            self.tooltip,
+            justify='left',
+            background='#2c3e50',
+            foreground='white',
+            relief='solid',
+            borderwidth=1,
+            font=('Helvetica', 9),
+            padx=10,
+            pady=5
+        )
+        self.tooltip_label.pack()
     
     def create_stat_card(self, parent, label_text, color):
         """Create a statistics card."""
@@ -218,193 +274,305 @@ class BlockVisualizationGUI:
         return card_frame
     
     def update_visualization(self):
-        """Update the visualization with current data."""
+        """Update the visualization with current data. Returns whether anything changed."""
         if not self.fs.mounted:
-            return
+            return False
+        
+        # Nothing to redraw unless allocations or the I/O counters moved
+        disk = self.fs.disk
+        state = (self.fs.alloc_version, disk.reads, disk.writes)
+        if state == self.last_state:
+            return False
         
         data = self.fs.get_visualization_data()
         if not data or data.get('total_blocks', 0) == 0:
-            return
-        
-        # Check if data changed
-        if data == self.last_data:
-            return
+            return False
         
-        self.last_data = data.copy()
+        self.last_state = state
         
-        # Update statistics
-        self.stat_cards['superblock'].value_label.config(
-            text=str(len(data.get('superblock_blocks', [])))
-        )
-        self.stat_cards['inode'].value_label.config(
-            text=str(len(data.get('inode_blocks', [])))
-        )
-        self.stat_cards['used'].value_label.config(
-            text=str(len(data.get('data_blocks_used', [])))
-        )
-        self.stat_cards['free'].value_label.config(
-            text=str(len(data.get('data_blocks_free', [])))
+        # Update statistics, touching only the cards whose text changed
+        stats = (
+            ('superblock', str(data.get('superblock_count', 0))),
+            ('inode', str(data.get('inode_count', 0))),
+            ('used', str(data.get('data_used_count', 0))),
+            ('free', str(data.get('data_free_count', 0))),
+            ('io', f"R:{data.get('disk_reads', 0)} W:{data.get('disk_writes', 0)}"),
         )
-        self.stat_cards['io'].value_label.config(
-            text=f"R:{data.get('disk_reads', 0)} W:{data.get('disk_writes', 0)}"
-        )
-        
-        # Update blocks grid
-        self.update_blocks_grid(data)
+        for key, text in stats:
+            if self.stat_text.get(key) != text:
+                self.stat_text[key] = text
+                self.stat_cards[key].value_label.config(text=text)
+        
+        # Update blocks grid, which only I/O counter changes leave as is
+        if data['alloc_version'] != self.grid_version:
+            self.grid_version = data['alloc_version']
+            self.update_blocks_grid(data)
+        return True
     
     def update_blocks_grid(self, data):
         """Update the blocks grid."""
-        # Clear existing blocks
-        for widget in self.blocks_grid_frame.winfo_children():
-            widget.destroy()
-        
-        self.block_buttons = []
         total_blocks = data['total_blocks']
+        if len(self.drawn_map) != total_blocks:
+            self.create_block_grid(total_blocks)
         
-        # Calculate grid dimensions (try to make it roughly square)
-        cols = min(40, total_blocks)  # Max 40 columns
+        # One class byte per block replaces per-block set lookups
+        self.block_map = data['block_map']
+        self.draw_visible_blocks()
+    
+    def draw_visible_blocks(self):
+        """Bring the rows of the grid in view up to date with the block map."""
+        block_map, drawn_map = self.block_map, self.drawn_map
+        if not drawn_map or len(block_map) != len(drawn_map):
+            return
+        
+        first_row, last_row = self.visible_rows()
+        start = first_row * self.grid_cols
+        end = min(len(block_map), (last_row + 1) * self.grid_cols)
+        
+        # Redraw only the blocks whose class changed, skipping unchanged
+        # spans of the map with a single comparison each
+        for span_start in range(start, end, DIFF_SPAN):
+            span_end = min(end, span_start + DIFF_SPAN)
+            span = block_map[span_start:span_end]
+            old_span = drawn_map[span_start:span_end]
+            if span == old_span:
+                continue
+            
+            for i, (block_class, old_class) in enumerate(zip(span, old_span), span_start):
+                if block_class != old_class:
+                    self.draw_block(i, block_class)
+            drawn_map[span_start:span_end] = span
+    
+    def visible_rows(self):
+        """Get the first and last grid rows within the scrolled view, plus a buffer."""
+        rows = (len(self.drawn_map) + self.grid_cols - 1) // self.grid_cols
+        try:
+            view_top = self.page_canvas.canvasy(0)
+            view_height = self.page_canvas.winfo_height()
+            grid_top = self.blocks_canvas.winfo_rooty() - self.scrollable_frame.winfo_rooty()
+        except (tk.TclError, TypeError):
+            return 0, rows - 1
+        
+        # Before the window is mapped there is no view to go by
+        if view_height <= 1:
+            return 0, rows - 1
+        
+        first_row = int(view_top - grid_top) // self.grid_px - ROW_BUFFER
+        last_row = int(view_top + view_height - grid_top) // self.grid_px + ROW_BUFFER
+        return max(0, first_row), min(rows - 1, last_row)
+    
+    def on_page_scroll(self, first, last):
+        """Move the scrollbar and draw grid rows that scrolled into view."""
+        self.page_scrollbar.set(first, last)
+        self.draw_visible_blocks()
+    
+    def draw_block(self, block_num, block_class):
+        """Redraw one block of the grid in the colors of its class."""
+        bg_color, _, _, text = self.block_styles[block_class]
+        if self.block_image is not None:
+            row, col = divmod(block_num, self.grid_cols)
+            x, y = col * RASTER_PX, row * RASTER_PX
+            self.block_image.put(bg_color, to=(x, y, x + RASTER_PX - 1, y + RASTER_PX - 1))
+        else:
+            rect, label = self.block_items[block_num]
+            self.blocks_canvas.itemconfigure(rect, fill=bg_color)
+            self.blocks_canvas.itemconfigure(label, text=text)
+    
+    def create_block_grid(self, total_blocks):
+        """Lay out the grid canvas for a disk of the given size."""
+        canvas = self.blocks_canvas
+        canvas.delete('all')
+        self.block_items = []
+        self.block_image = None
+        self.hover_block = None
+        
+        # A new grid starts out drawn as free blocks
+        self.drawn_map = bytearray(BLOCK_FREE * total_blocks)
+        
+        if total_blocks > RASTER_BLOCKS:
+            self.create_block_image(total_blocks)
+        else:
+            self.create_block_items(total_blocks)
+    
+    def create_block_image(self, total_blocks):
+        """Draw the grid as one image with a small tile per block."""
+        canvas = self.blocks_canvas
+        cols = self.grid_cols = min(RASTER_COLS, total_blocks)
         rows = (total_blocks + cols - 1) // cols
+        self.grid_px = RASTER_PX
+        width, height = cols * RASTER_PX, rows * RASTER_PX
+        canvas.configure(width=width, height=height)
+        
+        # Fill the image with one free tile, drawn one pixel short so the
+        # background shows as a grid, repeated across the whole image
+        free, gap = self.colors['free'], self.colors['card_bg']
+        tile_row = '{' + ' '.join([free] * (RASTER_PX - 1) + [gap]) + '}'
+        gap_row = '{' + ' '.join([gap] * RASTER_PX) + '}'
+        tile = ' '.join([tile_row] * (RASTER_PX - 1) + [gap_row])
+        
+        self.block_image = tk.PhotoImage(width=width, height=height)
+        self.block_image.put(tile, to=(0, 0, width, height))
+        
+        # Blank out the tiles past the last block
+        last_col = total_blocks - (rows - 1) * cols
+        if last_col < cols:
+            self.block_image.put(gap, to=(last_col * RASTER_PX, height - RASTER_PX, width, height))
+        canvas.create_image(0, 0, anchor='nw', image=self.block_image)
+    
+    def create_block_items(self, total_blocks):
+        """Create one rectangle and label item per block on the grid canvas."""
+        canvas = self.blocks_canvas
         
-        superblock_set = set(data.get('superblock_blocks', []))
-        inode_set = set(data.get('inode_blocks', []))
-        used_set = set(data.get('data_blocks_used', []))
+        # Calculate grid dimensions (try to make it roughly square)
+        cols = self.grid_cols = min(40, total_blocks)  # Max 40 columns
+        rows = (total_blocks + cols - 1) // cols
+        self.grid_px = BLOCK_PX
+        canvas.configure(width=cols * BLOCK_PX, height=rows * BLOCK_PX)
         
         for i in range(total_blocks):
-            row = i // cols
-            col = i % cols
-            
-            # Determine block type and color
-            if i in superblock_set:
-                bg_color = self.colors['superblock']
-                block_type = 'Superblock'
-                block_info = 'File system metadata'
-                text = 'S'
-            elif i in inode_set:
-                bg_color = self.colors['inode']
-                block_type = 'Inode Block'
-                block_info = 'File/directory metadata'
-                text = 'I'
-            elif i in used_set:
-                bg_color = self.colors['used']
-                block_type = 'Data Block (Used)'
-                block_info = 'Contains file data'
-                text = 'D'
-            else:
-                bg_color = self.colors['free']
-                block_type = 'Free Block'
-                block_info = 'Available for allocation'
-                text = ''
-            
-            # Create block button
-            block_btn = tk.Label(
-                self.blocks_grid_frame,
-                text=text,
-                width=2,
-                height=1,
-                bg=bg_color,
-                fg='white' if bg_color != self.colors['free'] else '#7f8c8d',
-                font=('Courier', 8, 'bold'),
-                relief='raised',
-                borderwidth=1,
-                cursor='hand2'
+            row, col = divmod(i, cols)
+            x, y = col * BLOCK_PX, row * BLOCK_PX
+            rect = canvas.create_rectangle(
+                x + 1, y + 1, x + BLOCK_PX - 1, y + BLOCK_PX - 1,
+                fill=self.colors['free'],
+                outline=self.colors['card_bg']
             )
-            block_btn.grid(row=row, column=col, padx=1, pady=1)
             
-            # Bind hover events
-            block_btn.bind('<Enter>', 
-                          lambda e, num=i, typ=block_type, info=block_info: 
-                          self.on_block_hover(e, num, typ, info))
-            block_btn.bind('<Leave>', self.on_block_leave)
+            label = canvas.create_text(
+                x + BLOCK_PX // 2, y + BLOCK_PX // 2,
+                text='',
+                fill='white',
+                font=('Courier', 8, 'bold')
+            )
             
-            self.block_buttons.append(block_btn)
+            self.block_items.append((rect, label))
     
-    def on_block_hover(self, event, block_num, block_type, block_info):
+    def on_grid_motion(self, event):
+        """Track which block of the grid is under the pointer."""
+        if not self.drawn_map:
+            return
+        
+        col = int(self.blocks_canvas.canvasx(event.x)) // self.grid_px
+        row = int(self.blocks_canvas.canvasy(event.y)) // self.grid_px
+        block_num = row * self.grid_cols + col
+        if col >= self.grid_cols or not 0 <= block_num < len(self.block_map):
+            block_num = None
+        
+        if block_num != self.hover_block:
+            self.on_grid_leave(event)
+            if block_num is not None:
+                self.hover_block = block_num
+                self.on_block_hover(event, block_num)
+    
+    def on_grid_leave(self, event):
+        """Clear the hovered block of the grid."""
+        if self.hover_block is not None:
+            self.on_block_leave(event, self.hover_block)
+            self.hover_block = None
+    
+    def on_block_hover(self, event, block_num):
         """Handle block hover event."""
-        widget = event.widget
+        if block_num >= len(self.block_map):
+            return
         
-        # Highlight effect
-        current_bg = widget.cget('bg')
-        widget.original_bg = current_bg
+        _, block_type, block_info, _ = self.block_styles[self.block_map[block_num]]
         
-        # Make it brighter
-        widget.config(relief='solid', borderwidth=2)
+        # Highlight effect
+        if block_num < len(self.block_items):
+            rect, _ = self.block_items[block_num]
+            self.blocks_canvas.itemconfigure(rect, outline='white', width=2)
         
         # Show tooltip
-        tooltip_text = f"Block #{block_num}\nType: {block_type}\n{block_info}"
-        widget.config(cursor='hand2')
-        
-        # Create tooltip window
-        self.tooltip = tk.Toplevel(widget)
-        self.tooltip.wm_overrideredirect(True)
+        self.tooltip_label.config(text=f"Block #{block_num}\nType: {block_type}\n{block_info}")
         self.tooltip.wm_geometry(f"+{event.x_root+10}+{event.y_root+10}")
-        
-        label = tk.Label(
-            self.tooltip,
-            text=tooltip_text,
-            justify='left',
-            background='#2c3e50',
-            foreground='white',
-            relief='solid',
-            borderwidth=1,
-            font=('Helvetica', 9),
-            padx=10,
-            pady=5
-        )
-        label.pack()
+        self.tooltip.deiconify()
     
-    def on_block_leave(self, event):
+    def on_block_leave(self, event, block_num):
         """Handle block leave event."""
-        widget = event.widget
-        widget.config(relief='raised', borderwidth=1)
+        if block_num < len(self.block_items):
+            rect, _ = self.block_items[block_num]
+            self.blocks_canvas.itemconfigure(rect, outline=self.colors['card_bg'], width=1)
         
-        # Destroy tooltip
-        if hasattr(self, 'tooltip'):
-            self.tooltip.destroy()
+        # Hide tooltip
+        self.tooltip.withdraw()
     
     def update_loop(self):
-        """Continuous update loop."""
-        self.update_visualization()
-        self.root.after(1000, self.update_loop)  # Update every second
+        """Continuous update loop, polling less often while nothing changes."""
+        if self.update_visualization():
+            self.update_delay = UPDATE_MIN_MS
+        else:
+            self.update_delay = min(self.update_delay * 2, UPDATE_MAX_MS)
+        self.update_job = self.root.after(self.update_delay, self.update_loop)
     
-    def run(self):
-        """Start the GUI main loop."""
-        self.root.mainloop()
+    def wake(self):
+        """Refresh as soon as Tk is idle after a file system change."""
+        if self.update_job:
+            self.root.after_cancel(self.update_job)
+        self.update_delay = UPDATE_MIN_MS
+        self.update_job = self.root.after_idle(self.update_loop)
 
 
 class GUIManager:
-    """Manager for GUI in separate thread."""
+    """Manager for the GUI window, which runs on the main thread."""
     
     def __init__(self, fs: 'FileSystem'):
         self.fs = fs
         self.gui = None
-        self.thread = None
-        self.is_running = False
     
     def start(self):
-        """Start GUI in separate thread."""
+        """Open the GUI window."""
         if not TKINTER_AVAILABLE:
             print("Error: tkinter is not available. Cannot start GUI.")
             return
         
-        self.is_running = True
-        self.thread = threading.Thread(target=self._run_gui, daemon=False)
-        self.thread.start()
+        try:
+            self.gui = BlockVisualizationGUI(self.fs)
+        except Exception as e:
+            print(f"GUI Error: {e}")
+            self.gui = None
+            return
+        
+        self.gui.root.protocol("WM_DELETE_WINDOW", self.close)
+        self.fs.set_gui_callback(self.gui.wake)
         
         print("\n🖥️  GUI Visualization window opened!")
-        print("   The visualization updates automatically every second.\n")
+        print("   The visualization updates automatically as blocks change.\n")
     
-    def _run_gui(self):
-        """Run GUI in thread."""
+    def run(self, poll, interval_ms: int):
+        """Run the GUI event loop, calling poll periodically until it returns False or the window closes."""
+        if not self.gui:
+            return
+        
+        root = self.gui.root
+        
+        def tick():
+            done = False
+            try:
+                done = not poll()
+            finally:
+                # Keep polling even if poll raised, so input is never stranded
+                if done:
+                    root.quit()
+                else:
+                    root.after(interval_ms, tick)
+        
+        root.after(interval_ms, tick)
         try:
-            self.gui = BlockVisualizationGUI(self.fs)
-            self.gui.run()
+            root.mainloop()
         except Exception as e:
             print(f"GUI Error: {e}")
-        finally:
-            # Mark as not running when window closes
-            self.is_running = False
+            self.close()
+    
+    def close(self):
+        """Close the GUI window."""
+        if self.gui:
+            self.fs.set_gui_callback(None)
+            try:
+                self.gui.root.destroy()
+            except Exception:
+                pass
             self.gui = None
     
     def is_alive(self):
         """Check if GUI is still running."""
-        return self.is_running and self.thread and self.thread.is_alive()
\ No newline at end of file
+        return self.gui is not None
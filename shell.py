@@ -1,13 +1,18 @@
 """Interactive shell for file system operations."""
 
+import functools
 import os
-import struct
+import queue
+import signal
+import stat
+import sys
+import threading
 from datetime import datetime
 
 from file_system import FileSystem
 from disk_emulator import DiskEmulator
 from structures import Inode
-from constants import BLOCK_SIZE, POINTERS_PER_BLOCK
+from constants import BLOCK_SIZE, COPY_BUFFER_SIZE
 
 try:
     from gui import GUIManager, TKINTER_AVAILABLE
@@ -15,6 +20,62 @@ except ImportError:
     TKINTER_AVAILABLE = False
     print("Warning: GUI module not available")
 
+try:
+    import readline
+except ImportError:
+    readline = None
+
+HISTORY_FILE = os.path.expanduser("~/.fs_sim_history")
+HISTORY_LENGTH = 1000
+POLL_INTERVAL_MS = 50  # How often the GUI event loop checks for typed input
+
+# Argument types per command; numeric arguments are converted before dispatch
+ARG_TYPES = {
+    'rm': (int,),
+    'stat': (int,),
+    'cat': (int,),
+    'write': (int,),
+    'edit': (int,),
+    'cp': (int, int),
+    'copyin': (str, int),
+    'copyout': (int, str),
+}
+
+# Row layout of the ls table
+LS_ROW = "{:<20} {:<8} {:<6} {:<10} {:<20} {:<20}"
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+@functools.lru_cache(maxsize=4096)
+def format_timestamp(timestamp: int) -> str:
+    """Format an inode timestamp for display, caching repeated values."""
+    return datetime.fromtimestamp(timestamp).strftime(TIME_FORMAT)
+
+
+HELP_TEXT = """
+Available Commands:
+  gui                 - Open live GUI visualization in window
+  format              - Format the disk with a new file system
+  mount               - Mount the file system
+  unmount             - Unmount the file system
+  sync                - Flush pending writes to the disk image
+  debug               - Display file system debug information
+  create <file>       - Create a new file
+  mkdir <dir>         - Create a new directory
+  ls                  - List files in current directory
+  cd <dir>            - Change directory
+  rm <inode>          - Remove a file by inode number
+  stat <inode>        - Display file statistics
+  cat <inode>         - Display file contents
+  write <inode> <txt> - Append text to end of file
+  edit <inode>        - Interactive editor for file
+  cp <src> <dst>      - Copy file (inode numbers)
+  copyin <file> <ino> - Copy file from host to fs
+  copyout <ino> <file>- Copy file from fs to host
+  help                - Display this help message
+  exit, quit          - Exit the shell
+"""
+
 
 class Shell:
     """Interactive shell for file system operations."""
@@ -24,6 +85,34 @@ class Shell:
         self.disk = None
         self.running = True
         self.gui_server = None
+        self.pending_input = None
+        self.discard_input = False
+        self.history_enabled = False
+        
+        # Command routing table, built once
+        self.commands = {
+            'help': self.cmd_help,
+            'gui': self.cmd_gui,
+            'format': self.cmd_format,
+            'mount': self.cmd_mount,
+            'unmount': self.cmd_unmount,
+            'sync': self.cmd_sync,
+            'debug': self.cmd_debug,
+            'create': self.cmd_create,
+            'mkdir': self.cmd_mkdir,
+            'ls': self.cmd_ls,
+            'cd': self.cmd_cd,
+            'rm': self.cmd_rm,
+            'stat': self.cmd_stat,
+            'cat': self.cmd_cat,
+            'write': self.cmd_write,
+            'edit': self.cmd_edit,
+            'cp': self.cmd_cp,
+            'copyin': self.cmd_copyin,
+            'copyout': self.cmd_copyout,
+            'exit': self.cmd_exit,
+            'quit': self.cmd_exit,
+        }
     
     def run(self, disk_path: str, blocks: int):
         """Run the shell."""
@@ -41,6 +130,14 @@ class Shell:
         print("Type 'help' for available commands")
         print("Type 'gui' to open the live visualization\n")
         
+        self._setup_readline()
+        
+        # Hold command output in the stdout buffer and flush it once per
+        # command instead of on every line
+        line_buffering = getattr(sys.stdout, 'line_buffering', False)
+        if line_buffering:
+            sys.stdout.reconfigure(line_buffering=False)
+        
         while self.running:
             try:
                 # Get current directory
@@ -49,7 +146,7 @@ class Shell:
                 else:
                     prompt = "sfs> "
                 
-                command = input(prompt).strip()
+                command = self.read_line(prompt).strip()
                 if not command:
                     continue
                 
@@ -61,15 +158,101 @@ class Shell:
                 break
             except Exception as e:
                 print(f"Error: {e}")
+            finally:
+                sys.stdout.flush()
         
         # Cleanup
         if self.gui_server:
-            # GUI cleanup handled by window close
-            pass
+            self.gui_server.close()
         if self.fs.mounted:
             self.fs.unmount()
         self.disk.close()
         print("\nGoodbye!")
+        
+        if line_buffering:
+            sys.stdout.reconfigure(line_buffering=True)
+        
+        if self.history_enabled:
+            try:
+                readline.write_history_file(HISTORY_FILE)
+            except OSError:
+                pass
+    
+    def read_line(self, prompt: str = '') -> str:
+        """Read a line of input, keeping the GUI responsive while it is open."""
+        if self.pending_input is None:
+            if not (self.gui_server and self.gui_server.is_alive()):
+                return input(prompt)
+            
+            # Tk owns the main thread while the window is open, so the line
+            # is read on a worker thread instead
+            self.pending_input = queue.Queue(maxsize=1)
+            threading.Thread(target=self._read_input, args=(prompt, self.pending_input),
+                             daemon=True).start()
+        
+        pending = self.pending_input
+        try:
+            while pending.empty() and self.gui_server and self.gui_server.is_alive():
+                self._run_gui_until(pending)
+            line, error = pending.get()
+        except KeyboardInterrupt:
+            # The worker cannot be stopped mid-line, so drop what it returns
+            self.discard_input = True
+            raise
+        
+        self.pending_input = None
+        if error:
+            raise error
+        if self.discard_input:
+            self.discard_input = False
+            return self.read_line(prompt)
+        return line
+    
+    @staticmethod
+    def _read_input(prompt: str, result: queue.Queue):
+        """Read one line on a worker thread, passing on the line or the error raised."""
+        try:
+            result.put((input(prompt), None))
+        except Exception as e:
+            result.put((None, e))
+    
+    def _run_gui_until(self, pending: queue.Queue):
+        """Run the GUI event loop until input arrives, the window closes or Ctrl-C is pressed."""
+        # Ctrl-C only sets a flag here: raised inside a Tk callback it would
+        # be swallowed by tkinter and stop the polling
+        interrupted = []
+        previous = signal.signal(signal.SIGINT, lambda signum, frame: interrupted.append(signum))
+        try:
+            self.gui_server.run(lambda: pending.empty() and not interrupted, POLL_INTERVAL_MS)
+        finally:
+            signal.signal(signal.SIGINT, previous)
+        
+        if interrupted:
+            raise KeyboardInterrupt
+    
+    def _setup_readline(self):
+        """Enable line editing, command completion and persistent history."""
+        # Piped or redirected input is not interactive, so leave readline
+        # and the user's history file alone
+        if not readline or not sys.stdin.isatty():
+            return
+        
+        self.history_enabled = True
+        readline.set_completer(self._complete_command)
+        readline.parse_and_bind('tab: complete')
+        readline.set_history_length(HISTORY_LENGTH)
+        try:
+            readline.read_history_file(HISTORY_FILE)
+        except OSError:
+            pass
+    
+    def _complete_command(self, text: str, state: int):
+        """Complete command names at the start of the line."""
+        if readline.get_line_buffer()[:readline.get_begidx()].strip():
+            return None
+        
+        matches = [name + ' ' for name in self.commands if name.startswith(text)]
+        return matches[state] if state < len(matches) else None
     
     def execute_command(self, command: str):
         """Execute a shell command."""
@@ -80,57 +263,24 @@ class Shell:
         cmd = parts[0].lower()
         args = parts[1:]
         
-        # Command routing
-        commands = {
-            'help': self.cmd_help,
-            'gui': self.cmd_gui,
-            'format': self.cmd_format,
-            'mount': self.cmd_mount,
-            'unmount': self.cmd_unmount,
-            'debug': self.cmd_debug,
-            'create': self.cmd_create,
-            'mkdir': self.cmd_mkdir,
-            'ls': self.cmd_ls,
-            'cd': self.cmd_cd,
-            'rm': self.cmd_rm,
-            'stat': self.cmd_stat,
-            'cat': self.cmd_cat,
-            'write': self.cmd_write,
-            'edit': self.cmd_edit,
-            'cp': self.cmd_cp,
-            'copyin': self.cmd_copyin,
-            'copyout': self.cmd_copyout,
-            'exit': self.cmd_exit,
-            'quit': self.cmd_exit,
-        }
+        # Convert typed arguments once, for every handler
+        arg_types = ARG_TYPES.get(cmd)
+        if arg_types:
+            try:
+                args = [convert(arg) for convert, arg in zip(arg_types, args)] + args[len(arg_types):]
+            except ValueError:
+                print("Error: Invalid inode number")
+                return
         
-        if cmd in commands:
-            commands[cmd](args)
+        handler = self.commands.get(cmd)
+        if handler:
+            handler(args)
         else:
             print(f"Unknown command: {cmd}. Type 'help' for available commands.")
     
     def cmd_help(self, args):
         """Display help information."""
-        print("\nAvailable Commands:")
-        print("  gui                 - Open live GUI visualization in window")
-        print("  format              - Format the disk with a new file system")
-        print("  mount               - Mount the file system")
-        print("  unmount             - Unmount the file system")
-        print("  debug               - Display file system debug information")
-        print("  create <file>       - Create a new file")
-        print("  mkdir <dir>         - Create a new directory")
-        print("  ls                  - List files in current directory")
-        print("  cd <dir>            - Change directory")
-        print("  rm <inode>          - Remove a file by inode number")
-        print("  stat <inode>        - Display file statistics")
-        print("  cat <inode>         - Display file contents")
-        print("  write <inode> <txt> - Append text to end of file")
-        print("  edit <inode>        - Interactive editor for file")
-        print("  cp <src> <dst>      - Copy file (inode numbers)")
-        print("  copyin <file> <ino> - Copy file from host to fs")
-        print("  copyout <ino> <file>- Copy file from fs to host")
-        print("  help                - Display this help message")
-        print("  exit, quit          - Exit the shell\n")
+        print(HELP_TEXT)
     
     def cmd_gui(self, args):
         """Open GUI visualization."""
@@ -174,6 +324,11 @@ class Shell:
         """Unmount the file system."""
         self.fs.unmount()
     
+    def cmd_sync(self, args):
+        """Flush pending writes to the disk image."""
+        if self.fs.sync():
+            print("File system synced")
+    
     def cmd_debug(self, args):
         """Display debug information."""
         self.fs.debug()
@@ -190,7 +345,7 @@ class Shell:
             # Get inode to show creation time
             inode = self.fs._load_inode(self.fs.disk, inode_num)
             if inode:
-                created_time = datetime.fromtimestamp(inode.created).strftime('%Y-%m-%d %H:%M:%S')
+                created_time = format_timestamp(inode.created)
                 print(f"Created file '{filename}' with inode {inode_num}")
                 print(f"  Created at: {created_time}")
         else:
@@ -208,7 +363,7 @@ class Shell:
             # Get inode to show creation time
             inode = self.fs._load_inode(self.fs.disk, inode_num)
             if inode:
-                created_time = datetime.fromtimestamp(inode.created).strftime('%Y-%m-%d %H:%M:%S')
+                created_time = format_timestamp(inode.created)
                 print(f"Created directory '{dirname}' with inode {inode_num}")
                 print(f"  Created at: {created_time}")
         else:
@@ -221,16 +376,17 @@ class Shell:
             print("(empty directory)")
             return
         
-        print(f"\n{'Name':<20} {'Inode':<8} {'Type':<6} {'Size':<10} {'Created':<20} {'Modified':<20}")
-        print("-" * 100)
+        rows = ["\n" + LS_ROW.format('Name', 'Inode', 'Type', 'Size', 'Created', 'Modified'),
+                "-" * 100]
         for name, inode_num, inode_type, size in entries:
             # Get inode to retrieve timestamps
             inode = self.fs._load_inode(self.fs.disk, inode_num)
             if inode:
-                created = datetime.fromtimestamp(inode.created).strftime('%Y-%m-%d %H:%M:%S')
-                modified = datetime.fromtimestamp(inode.modified).strftime('%Y-%m-%d %H:%M:%S')
-                print(f"{name:<20} {inode_num:<8} {inode_type:<6} {size:<10} {created:<20} {modified:<20}")
-        print()
+                created = format_timestamp(inode.created)
+                modified = format_timestamp(inode.modified)
+                rows.append(LS_ROW.format(name, inode_num, inode_type, size, created, modified))
+        rows.append("")
+        print("\n".join(rows))
     
     def cmd_cd(self, args):
         """Change directory."""
@@ -247,14 +403,11 @@ class Shell:
             print("Usage: rm <inode_number>")
             return
         
-        try:
-            inode_num = int(args[0])
-            if self.fs.remove_file(inode_num):
-                print(f"Removed inode {inode_num}")
-            else:
-                print("Failed to remove file")
-        except ValueError:
-            print("Error: Invalid inode number")
+        inode_num = args[0]
+        if self.fs.remove_file(inode_num):
+            print(f"Removed inode {inode_num}")
+        else:
+            print("Failed to remove file")
     
     def cmd_stat(self, args):
         """Display file statistics."""
@@ -262,49 +415,44 @@ class Shell:
             print("Usage: stat <inode_number>")
             return
         
-        try:
-            inode_num = int(args[0])
-            
-            # Get inode details
-            inode = self.fs._load_inode(self.fs.disk, inode_num)
-            if not inode or not inode.valid:
-                print("Error: Invalid inode")
-                return
-            
-            # Display detailed information
-            print(f"\n{'='*60}")
-            print(f"File Statistics for Inode {inode_num}")
-            print(f"{'='*60}")
-            print(f"  Type:           {'Directory' if inode.inode_type == Inode.TYPE_DIR else 'File'}")
-            print(f"  Size:           {inode.size} bytes")
-            print(f"  Created:        {datetime.fromtimestamp(inode.created).strftime('%Y-%m-%d %H:%M:%S')}")
-            print(f"  Modified:       {datetime.fromtimestamp(inode.modified).strftime('%Y-%m-%d %H:%M:%S')}")
-            
-            # Show allocated blocks
-            direct_blocks = [b for b in inode.direct if b != 0]
-            if direct_blocks:
-                print(f"  Direct Blocks:  {direct_blocks}")
-            else:
-                print(f"  Direct Blocks:  None")
-            
-            if inode.indirect != 0:
-                print(f"  Indirect Block: {inode.indirect}")
-                
-                # Count indirect pointers
-                indirect_data = self.fs.disk.read(inode.indirect)
-                if indirect_data:
-                    pointers = struct.unpack('<' + 'I' * POINTERS_PER_BLOCK, indirect_data)
-                    indirect_count = sum(1 for p in pointers if p != 0)
-                    print(f"  Indirect Ptrs:  {indirect_count} data blocks")
-            else:
-                print(f"  Indirect Block: None")
-            
-            total_blocks = len(direct_blocks) + (1 if inode.indirect != 0 else 0)
-            print(f"  Total Blocks:   {total_blocks}")
-            print(f"{'='*60}\n")
+        inode_num = args[0]
+        
+        # Get inode details
+        inode = self.fs._load_inode(self.fs.disk, inode_num)
+        if not inode or not inode.valid:
+            print("Error: Invalid inode")
+            return
+        
+        # Display detailed information
+        print(f"\n{'='*60}")
+        print(f"File Statistics for Inode {inode_num}")
+        print(f"{'='*60}")
+        print(f"  Type:           {'Directory' if inode.inode_type == Inode.TYPE_DIR else 'File'}")
+        print(f"  Size:           {inode.size} bytes")
+        print(f"  Created:        {format_timestamp(inode.created)}")
+        print(f"  Modified:       {format_timestamp(inode.modified)}")
+        
+        # Show allocated blocks
+        direct_blocks = [b for b in inode.direct if b != 0]
+        if direct_blocks:
+            print(f"  Direct Blocks:  {direct_blocks}")
+        else:
+            print(f"  Direct Blocks:  None")
+        
+        if inode.indirect != 0:
+            print(f"  Indirect Block: {inode.indirect}")
             
-        except ValueError:
-            print("Error: Invalid inode number")
+            # Count indirect pointers
+            pointers = self.fs._load_indirect(inode)
+            if pointers is not None:
+                indirect_count = len(pointers) - pointers.count(0)
+                print(f"  Indirect Ptrs:  {indirect_count} data blocks")
+        else:
+            print(f"  Indirect Block: None")
+        
+        total_blocks = len(direct_blocks) + (1 if inode.indirect != 0 else 0)
+        print(f"  Total Blocks:   {total_blocks}")
+        print(f"{'='*60}\n")
     
     def cmd_cat(self, args):
         """Display file contents."""
@@ -312,28 +460,37 @@ class Shell:
             print("Usage: cat <inode_number>")
             return
         
-        try:
-            inode_num = int(args[0])
-            size = self.fs.stat(inode_num)
-            if size < 0:
-                print("Error: Invalid inode")
-                return
-            
-            if size == 0:
-                print("(empty file)")
-                return
-            
-            data = self.fs.read(inode_num, size)
-            if data:
+        inode_num = args[0]
+        size = self.fs.stat(inode_num)
+        if size < 0:
+            print("Error: Invalid inode")
+            return
+        
+        if size == 0:
+            print("(empty file)")
+            return
+        
+        # Read straight into one buffer sized to the file
+        buffer = bytearray(size)
+        n = self.fs.readinto(inode_num, buffer)
+        data = buffer if n == size else buffer[:max(n, 0)]
+        if data:
+            # Text never holds NUL bytes, so most binary files are caught
+            # from their first block without a full decode attempt
+            text = None
+            if data.find(b'\x00', 0, BLOCK_SIZE) < 0:
                 try:
-                    print(data.decode('utf-8'))
+                    text = data.decode('utf-8')
                 except UnicodeDecodeError:
-                    print(f"(binary data, {len(data)} bytes)")
-                    print("First 100 bytes (hex):", data[:100].hex())
+                    pass
+            
+            if text is not None:
+                print(text)
             else:
-                print("(empty file)")
-        except ValueError:
-            print("Error: Invalid inode number")
+                print(f"(binary data, {len(data)} bytes)")
+                print("First 100 bytes (hex):", data[:100].hex())
+        else:
+            print("(empty file)")
     
     def cmd_write(self, args):
         """Write text to a file (appends to end by default)."""
@@ -341,35 +498,35 @@ class Shell:
             print("Usage: write <inode_number> <text>")
             return
         
-        try:
-            inode_num = int(args[0])
-            
-            # Get current file info
-            inode_before = self.fs._load_inode(self.fs.disk, inode_num)
-            if not inode_before or not inode_before.valid:
-                print("Error: Invalid inode")
-                return
-            
-            size_before = inode_before.size
-            
-            text = ' '.join(args[1:])
-            data = text.encode('utf-8')
-            
-            # Append at the end
-            bytes_written = self.fs.write(inode_num, data, offset=size_before)
-            if bytes_written > 0:
-                # Get updated inode to show modification time
-                inode_after = self.fs._load_inode(self.fs.disk, inode_num)
-                if inode_after:
-                    modified_time = datetime.fromtimestamp(inode_after.modified).strftime('%Y-%m-%d %H:%M:%S')
-                    print(f"Wrote {bytes_written} bytes to inode {inode_num}")
-                    print(f"  Modified at: {modified_time}")
-                    if size_before > 0:
-                        print(f"  Size: {size_before} → {inode_after.size} bytes")
-            else:
-                print("Failed to write data")
-        except ValueError:
-            print("Error: Invalid inode number")
+        inode_num = args[0]
+        
+        # Get current file info
+        inode_before = self.fs._load_inode(self.fs.disk, inode_num)
+        if not inode_before or not inode_before.valid:
+            print("Error: Invalid inode")
+            return
+        
+        size_before = inode_before.size
+        
+        # Encode a single word directly; join several as bytes
+        if len(args) == 2:
+            data = args[1].encode('utf-8')
+        else:
+            data = b' '.join([word.encode('utf-8') for word in args[1:]])
+        
+        # Append at the end
+        bytes_written = self.fs.write(inode_num, data, offset=size_before)
+        if bytes_written > 0:
+            # Get updated inode to show modification time
+            inode_after = self.fs._load_inode(self.fs.disk, inode_num)
+            if inode_after:
+                modified_time = format_timestamp(inode_after.modified)
+                print(f"Wrote {bytes_written} bytes to inode {inode_num}")
+                print(f"  Modified at: {modified_time}")
+                if size_before > 0:
+                    print(f"  Size: {size_before} → {inode_after.size} bytes")
+        else:
+            print("Failed to write data")
     
     def cmd_edit(self, args):
         """Interactive editor for file."""
@@ -378,7 +535,7 @@ class Shell:
             return
         
         try:
-            inode_num = int(args[0])
+            inode_num = args[0]
             
             # Read current content
             size = self.fs.stat(inode_num)
@@ -415,7 +572,7 @@ class Shell:
             lines = []
             while True:
                 try:
-                    line = input()
+                    line = self.read_line()
                     if line == "END":
                         break
                     if line == "CANCEL":
@@ -435,8 +592,6 @@ class Shell:
             else:
                 print("\nFailed to save changes")
                 
-        except ValueError:
-            print("Error: Invalid inode number")
         except KeyboardInterrupt:
             print("\nEdit cancelled")
     
@@ -446,29 +601,42 @@ class Shell:
             print("Usage: cp <src_inode> <dst_inode>")
             return
         
-        try:
-            src_inode = int(args[0])
-            dst_inode = int(args[1])
-            
-            # Read source
-            size = self.fs.stat(src_inode)
-            if size < 0:
-                print("Error: Invalid source inode")
-                return
-            
-            data = self.fs.read(src_inode, size)
-            if data is None:
-                print("Error: Failed to read source")
-                return
-            
-            # Write to destination
-            bytes_written = self.fs.write(dst_inode, data)
-            if bytes_written > 0:
-                print(f"Copied {bytes_written} bytes from inode {src_inode} to {dst_inode}")
-            else:
-                print("Failed to copy")
-        except ValueError:
-            print("Error: Invalid inode number")
+        src_inode = args[0]
+        dst_inode = args[1]
+        
+        # Read source
+        size = self.fs.stat(src_inode)
+        if size < 0:
+            print("Error: Invalid source inode")
+            return
+        
+        # Copying a file onto itself leaves it unchanged
+        if src_inode == dst_inode and size > 0:
+            print(f"Copied {size} bytes from inode {src_inode} to {dst_inode}")
+            return
+        
+        # Stream source chunks to the destination through one reused buffer
+        buffer = bytearray(COPY_BUFFER_SIZE)
+        bytes_written = 0
+        with memoryview(buffer) as view:
+            while bytes_written < size:
+                n = self.fs.readinto(src_inode, view, bytes_written)
+                if n < 0:
+                    print("Error: Failed to read source")
+                    return
+                if n == 0:
+                    break
+                
+                written = self.fs.write(dst_inode, view[:n], offset=bytes_written)
+                if written > 0:
+                    bytes_written += written
+                if written != n:
+                    break
+        
+        if bytes_written > 0:
+            print(f"Copied {bytes_written} bytes from inode {src_inode} to {dst_inode}")
+        else:
+            print("Failed to copy")
     
     def cmd_copyin(self, args):
         """Copy a file from host to file system."""
@@ -478,24 +646,34 @@ class Shell:
         
         host_file = args[0]
         try:
-            inode_num = int(args[1])
-            
-            # Read host file
-            if not os.path.exists(host_file):
-                print(f"Error: File '{host_file}' not found")
-                return
-            
-            with open(host_file, 'rb') as f:
-                data = f.read()
+            inode_num = args[1]
+            bytes_written = 0
+            with open(host_file, 'rb', buffering=0) as f:
+                # Stream through one reused buffer, no larger than a regular
+                # file; pipes and devices report no useful size
+                host_stat = os.fstat(f.fileno())
+                buffer_size = COPY_BUFFER_SIZE
+                if stat.S_ISREG(host_stat.st_mode) and host_stat.st_size > 0:
+                    buffer_size = min(host_stat.st_size, COPY_BUFFER_SIZE)
+                buffer = bytearray(buffer_size)
+                with memoryview(buffer) as view:
+                    while True:
+                        n = f.readinto(view)
+                        if not n:
+                            break
+                        
+                        written = self.fs.write(inode_num, view[:n], offset=bytes_written)
+                        if written > 0:
+                            bytes_written += written
+                        if written != n:
+                            break
             
-            # Write to file system
-            bytes_written = self.fs.write(inode_num, data)
             if bytes_written > 0:
                 print(f"Copied {bytes_written} bytes from '{host_file}' to inode {inode_num}")
             else:
                 print("Failed to copy file")
-        except ValueError:
-            print("Error: Invalid inode number")
+        except FileNotFoundError:
+            print(f"Error: File '{host_file}' not found")
         except Exception as e:
             print(f"Error: {e}")
     
@@ -506,7 +684,7 @@ class Shell:
             return
         
         try:
-            inode_num = int(args[0])
+            inode_num = args[0]
             host_file = args[1]
             
             # Read from file system
@@ -515,18 +693,48 @@ class Shell:
                 print("Error: Invalid inode")
                 return
             
-            data = self.fs.read(inode_num, size)
-            if data is None:
-                print("Error: Failed to read file")
-                return
-            
-            # Write to host
-            with open(host_file, 'wb') as f:
-                f.write(data)
+            with open(host_file, 'wb', buffering=COPY_BUFFER_SIZE) as f:
+                # Reserve the host file's space up front so it is laid out in one go
+                if size and hasattr(os, 'posix_fallocate'):
+                    try:
+                        os.posix_fallocate(f.fileno(), 0, size)
+                    except OSError:
+                        pass
+                
+                # Let the kernel copy the file's block runs straight out of
+                # the disk image, stopping at the first short copy
+                copied = 0
+                for block_num, length in self.fs.extents(inode_num):
+                    n = self.disk.copy_to_fd(block_num, length, f.fileno(), copied)
+                    copied += n
+                    if n != length:
+                        break
+                
+                # Stream anything left through one reused buffer
+                f.seek(copied)
+                failed = False
+                buffer = bytearray(COPY_BUFFER_SIZE)
+                with memoryview(buffer) as view:
+                    while copied < size:
+                        n = self.fs.readinto(inode_num, view, copied)
+                        if n < 0:
+                            print("Error: Failed to read file")
+                            failed = True
+                            break
+                        if n == 0:
+                            break
+                        
+                        f.write(view[:n])
+                        copied += n
+                
+                # Drop space reserved past a short or failed copy
+                f.flush()
+                if copied < size:
+                    f.truncate(copied)
             
-            print(f"Copied {len(data)} bytes from inode {inode_num} to '{host_file}'")
-        except ValueError:
-            print("Error: Invalid inode number")
+            if failed:
+                return
+            print(f"Copied {copied} bytes from inode {inode_num} to '{host_file}'")
         except Exception as e:
             print(f"Error: {e}")
     
@@ -1,15 +1,49 @@
 """Data structures for the file system."""
 
 import struct
+import sys
+from array import array
+from typing import Iterator, Tuple
 from constants import (
     BLOCK_SIZE, MAGIC_NUMBER, POINTERS_PER_INODE,
     INODE_SIZE, MAX_FILENAME
 )
 
+# Precompiled on-disk layouts
+SUPERBLOCK_STRUCT = struct.Struct('<5I')  # magic, blocks, inode blocks, inodes, root
+INODE_STRUCT = struct.Struct('<11I')  # valid, type, size, times, direct[5], indirect
+DIRENT_STRUCT = struct.Struct('<256sI4x')  # name, inode number, padding
+
+
+def unpack_pointers(data: bytes) -> array:
+    """Unpack an indirect block into an array of block pointers."""
+    pointers = array('I')
+    pointers.frombytes(data)
+    if sys.byteorder == 'big':
+        pointers.byteswap()
+    return pointers
+
+
+def pointer_view(data: bytes) -> memoryview:
+    """View an indirect block as block pointers, copying only on big-endian hosts."""
+    if sys.byteorder == 'little':
+        return memoryview(data).cast('I')
+    return memoryview(unpack_pointers(data))
+
+
+def pack_pointers(pointers: array) -> memoryview:
+    """Pack an array of block pointers into an indirect block, copying only on big-endian hosts."""
+    if sys.byteorder == 'big':
+        pointers = array('I', pointers)
+        pointers.byteswap()
+    return memoryview(pointers).cast('B')
+
 
 class SuperBlock:
     """Represents the file system superblock."""
     
+    __slots__ = ('magic_number', 'blocks', 'inode_blocks', 'inodes', 'root_inode')
+    
     def __init__(self):
         self.magic_number = MAGIC_NUMBER
         self.blocks = 0
@@ -19,20 +53,24 @@ class SuperBlock:
     
     def pack(self) -> bytes:
         """Pack superblock into bytes."""
-        data = struct.pack('<5I', 
-                          self.magic_number,
-                          self.blocks,
-                          self.inode_blocks,
-                          self.inodes,
-                          self.root_inode)
-        padding_size = BLOCK_SIZE - len(data)
-        return data + (b'\x00' * padding_size)
+        data = bytearray(BLOCK_SIZE)
+        self.pack_into(data, 0)
+        return bytes(data)
+    
+    def pack_into(self, buffer, offset: int):
+        """Pack superblock directly into a writable buffer at the given offset."""
+        SUPERBLOCK_STRUCT.pack_into(buffer, offset,
+                                    self.magic_number,
+                                    self.blocks,
+                                    self.inode_blocks,
+                                    self.inodes,
+                                    self.root_inode)
     
     @staticmethod
     def unpack(data: bytes) -> 'SuperBlock':
         """Unpack superblock from bytes."""
         sb = SuperBlock()
-        values = struct.unpack('<5I', data[:20])
+        values = SUPERBLOCK_STRUCT.unpack_from(data, 0)
         sb.magic_number = values[0]
         sb.blocks = values[1]
         sb.inode_blocks = values[2]
@@ -44,6 +82,9 @@ class SuperBlock:
 class Inode:
     """Represents an inode structure."""
     
+    __slots__ = ('valid', 'inode_type', 'size', 'created', 'modified',
+                 'direct', 'indirect', '_indirect_cache', '_indirect_dirty')
+    
     TYPE_FILE = 0
     TYPE_DIR = 1
     
@@ -53,46 +94,59 @@ class Inode:
         self.size = 0
         self.created = 0
         self.modified = 0
-        self.direct = [0] * POINTERS_PER_INODE
+        self.direct = (0,) * POINTERS_PER_INODE
         self.indirect = 0
+        # In-memory copy of the indirect block, loaded on first use
+        self._indirect_cache = None
+        self._indirect_dirty = False
     
     def pack(self) -> bytes:
         """Pack inode into bytes (44 bytes total)."""
-        packed = struct.pack('<11I',
-                            self.valid,
-                            self.inode_type,
-                            self.size,
-                            self.created,
-                            self.modified,
-                            self.direct[0],
-                            self.direct[1],
-                            self.direct[2],
-                            self.direct[3],
-                            self.direct[4],
-                            self.indirect)
-        return packed
+        return INODE_STRUCT.pack(self.valid,
+                                 self.inode_type,
+                                 self.size,
+                                 self.created,
+                                 self.modified,
+                                 *self.direct,
+                                 self.indirect)
+    
+    def pack_into(self, buffer, offset: int):
+        """Pack inode directly into a writable buffer at the given offset."""
+        INODE_STRUCT.pack_into(buffer, offset,
+                               self.valid,
+                               self.inode_type,
+                               self.size,
+                               self.created,
+                               self.modified,
+                               *self.direct,
+                               self.indirect)
     
     @staticmethod
     def unpack(data: bytes) -> 'Inode':
         """Unpack inode from bytes."""
-        if len(data) < 44:
-            data = data + b'\x00' * (44 - len(data))
-        
-        inode = Inode()
-        values = struct.unpack('<11I', data[:44])
-        inode.valid = values[0]
-        inode.inode_type = values[1]
-        inode.size = values[2]
-        inode.created = values[3]
-        inode.modified = values[4]
-        inode.direct = [values[5], values[6], values[7], values[8], values[9]]
-        inode.indirect = values[10]
+        if len(data) < INODE_SIZE:
+            data = data + b'\x00' * (INODE_SIZE - len(data))
+        return Inode.unpack_from(data, 0)
+    
+    @staticmethod
+    def unpack_from(data: bytes, offset: int = 0) -> 'Inode':
+        """Unpack inode directly from a buffer at the given offset."""
+        values = INODE_STRUCT.unpack_from(data, offset)
+        # Every slot is assigned below, so skip __init__'s defaults
+        inode = Inode.__new__(Inode)
+        inode.valid, inode.inode_type, inode.size, inode.created, inode.modified = values[:5]
+        inode.direct = values[5:5 + POINTERS_PER_INODE]
+        inode.indirect = values[5 + POINTERS_PER_INODE]
+        inode._indirect_cache = None
+        inode._indirect_dirty = False
         return inode
 
 
 class DirEntry:
     """Represents a directory entry."""
     
+    __slots__ = ('name', 'inode_num')
+    
     ENTRY_SIZE = 264  # 256 bytes for name + 4 bytes for inode + 4 padding
     
     def __init__(self, name: str = "", inode_num: int = 0):
@@ -101,15 +155,40 @@ class DirEntry:
     
     def pack(self) -> bytes:
         """Pack directory entry."""
-        name_bytes = self.name.encode('utf-8')[:MAX_FILENAME]
-        name_bytes = name_bytes.ljust(256, b'\x00')
-        return name_bytes + struct.pack('<I', self.inode_num) + b'\x00' * 4
+        return DIRENT_STRUCT.pack(self.name.encode('utf-8')[:MAX_FILENAME], self.inode_num)
+    
+    def pack_into(self, buffer, offset: int):
+        """Pack directory entry directly into a writable buffer at the given offset."""
+        DIRENT_STRUCT.pack_into(buffer, offset, self.name.encode('utf-8')[:MAX_FILENAME], self.inode_num)
     
     @staticmethod
     def unpack(data: bytes) -> 'DirEntry':
         """Unpack directory entry."""
         if len(data) < DirEntry.ENTRY_SIZE:
             return DirEntry("", 0)
-        name = data[:256].rstrip(b'\x00').decode('utf-8', errors='ignore')
-        inode_num = struct.unpack('<I', data[256:260])[0]
-        return DirEntry(name, inode_num)
\ No newline at end of file
+        return DirEntry.unpack_from(data, 0)
+    
+    @staticmethod
+    def unpack_from(data: bytes, offset: int = 0) -> 'DirEntry':
+        """Unpack directory entry directly from a buffer at the given offset."""
+        name, inode_num = DIRENT_STRUCT.unpack_from(data, offset)
+        return DirEntry(DirEntry.decode_name(name), inode_num)
+    
+    @staticmethod
+    def iter_raw_entries(data: bytes) -> Iterator[Tuple[bytes, int]]:
+        """Unpack every whole entry in a directory's data as (raw name, inode) pairs."""
+        usable = len(data) - len(data) % DirEntry.ENTRY_SIZE
+        return DIRENT_STRUCT.iter_unpack(memoryview(data)[:usable])
+    
+    @staticmethod
+    def iter_entries(data: bytes) -> Iterator[Tuple[str, int]]:
+        """Decode every whole entry in a directory's data as (name, inode) pairs."""
+        for name, inode_num in DirEntry.iter_raw_entries(data):
+            yield DirEntry.decode_name(name), inode_num
+    
+    @staticmethod
+    def decode_name(raw_name: bytes) -> str:
+        """Decode a NUL-padded on-disk entry name."""
+        # Names are short, so scanning forward to the first NUL beats rstrip
+        nul = raw_name.find(b'\x00', 0, MAX_FILENAME)
+        return raw_name[:nul if nul >= 0 else MAX_FILENAME].decode('utf-8', errors='ignore')